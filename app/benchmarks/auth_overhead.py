@@ -0,0 +1,100 @@
+"""
+Coût de l'authentification par requête, avec et sans le cache des tokens vérifiés.
+
+1. Micro-benchmark : vérification complète (jwt.decode) contre services.auth.verify_token
+   avec un cache chaud.
+2. Trafic d'écriture par lots : N clients envoient des POST /climbers/batch (upserts de
+   grimpeurs existants, sans changement de données) à l'application, en process via
+   httpx.ASGITransport. Le temps passé dans la vérification du token est mesuré à part.
+
+    python -m benchmarks.auth_overhead --concurrency 20 --requests 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import timeit
+
+import httpx
+import jwt
+
+import routers.utils
+from database import AsyncSessionLocal
+from main import app
+from schemas import Climber
+from services import auth
+from services import climbers as climber_service
+
+
+def micro(token: str, number: int):
+    auth.token_cache.clear()
+    auth.verify_token(token)  # Remplit le cache
+    decode = timeit.timeit(
+        lambda: jwt.decode(token, auth.JWT_SECRET_KEY, algorithms=[auth.JWT_SECRET_ALGORITHM]), number=number
+    )
+    cached = timeit.timeit(lambda: auth.verify_token(token), number=number)
+    print(f"jwt.decode          {decode / number * 1e6:8.2f} µs/appel")
+    print(f"verify_token (hit)  {cached / number * 1e6:8.2f} µs/appel")
+
+
+async def batch_traffic(token: str, rows: list, concurrency: int, requests_per_client: int):
+    auth_timings, latencies = [], []
+
+    def timed_verify(credentials: str) -> dict:
+        start = time.perf_counter()
+        try:
+            return auth.verify_token(credentials)
+        finally:
+            auth_timings.append(time.perf_counter() - start)
+
+    async def client_loop(client: httpx.AsyncClient):
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            response = await client.post("/climbers/batch", json={"upserts": rows})
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    routers.utils.verify_token = timed_verify
+    try:
+        transport = httpx.ASGITransport(app=app)
+        headers = {"Authorization": f"Bearer {token}"}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            start = time.perf_counter()
+            await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - start
+    finally:
+        routers.utils.verify_token = auth.verify_token
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{len(latencies)} lots en {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s) "
+        f"p50={quantiles[49] * 1000:.1f}ms p95={quantiles[94] * 1000:.1f}ms | "
+        f"auth moyenne={statistics.mean(auth_timings) * 1e6:.1f}µs total={sum(auth_timings) * 1000:.1f}ms"
+    )
+
+
+async def main(concurrency: int, requests_per_client: int, batch_size: int, number: int):
+    token = auth._encode_jwt(type("BenchUser", (), {"id": "benchmark"})())
+    micro(token, number)
+
+    async with AsyncSessionLocal() as db:
+        climbers = await climber_service.get_all_climbers(db, limit=batch_size)
+    rows = [Climber.model_validate(climber, from_attributes=True).model_dump(mode="json") for climber in climbers]
+
+    cache_size = auth.token_cache.maxsize
+    for label, maxsize in (("sans cache", 0), ("avec cache", cache_size)):
+        auth.token_cache.clear()
+        auth.token_cache.maxsize = maxsize
+        print(f"\n[{label}] {concurrency} clients x {requests_per_client} lots de {len(rows)} grimpeurs")
+        await batch_traffic(token, rows, concurrency, requests_per_client)
+    auth.token_cache.maxsize = cache_size
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=50, help="Lots envoyés par client")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--number", type=int, default=20000, help="Appels du micro-benchmark")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests, args.batch_size, args.number))
@@ -0,0 +1,58 @@
+"""
+Charge concurrente sur les endpoints du dashboard.
+
+Lance N clients qui rejouent les appels faits par Dashboard.js à chaque mouvement
+du slider d'âge, puis affiche le débit et les latences. À lancer contre une API
+démarrée (docker-compose up), avant et après un changement, pour comparer :
+
+    python -m benchmarks.dashboard_load --base-url http://localhost:5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+DASHBOARD_PATHS = [
+    "/BarChart_Climbers_Genders/",
+    "/PieChart_Climbers_Experience/",
+    "/PieChart_Climbers_Countries/",
+    "/scatterGradesByAge",
+]
+
+
+async def _client(client: httpx.AsyncClient, requests_per_client: int, latencies: list, errors: list):
+    for i in range(requests_per_client):
+        max_age = 12 + i % 59  # Balaye la plage du slider (12 - 70 ans)
+        for path in DASHBOARD_PATHS:
+            start = time.perf_counter()
+            response = await client.get(path, params={"max_age": max_age})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+
+
+async def run(base_url: str, concurrency: int, requests_per_client: int):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _client(client, requests_per_client, latencies, errors) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{len(latencies)} requêtes en {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s), {len(errors)} erreurs")
+    print(f"p50={quantiles[49] * 1000:.1f}ms p95={quantiles[94] * 1000:.1f}ms p99={quantiles[98] * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=20, help="Mouvements de slider par client")
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.concurrency, args.requests))
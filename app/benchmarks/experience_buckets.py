@@ -0,0 +1,67 @@
+"""
+Compare le calcul des tranches d'expérience en Python (chargement de tous les
+grimpeurs puis boucle), en SQL (CASE ... GROUP BY, utilisé tant que la copie en
+mémoire n'est pas chargée) et sur la copie en colonnes (services.snapshot, servie par
+l'API une fois démarrée), en latence et en mémoire. La copie est chargée avant la mesure.
+
+    python -m benchmarks.experience_buckets --repeat 20
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from sqlalchemy import select
+
+import models
+from database import AsyncSessionLocal
+from services import climbers as climber_service
+from services import dashboard, snapshot
+
+
+async def python_buckets(db, max_age):
+    """Ancienne implémentation : hydrate chaque grimpeur puis compte en Python."""
+    buckets = {label: 0 for label, _ in dashboard.EXPERIENCE_BUCKETS}
+    query = select(models.Climber)
+    if max_age is not None:
+        query = query.where(models.Climber.age <= max_age)
+    for climber in await db.scalars(query):
+        buckets[dashboard.experience_bucket(climber.years_cl)] += 1
+    return buckets
+
+
+async def snapshot_buckets(db, max_age):
+    """Tranches comptées sur la copie en colonnes, comme par l'API une fois démarrée."""
+    return snapshot.climbers.experience([label for label, _ in dashboard.EXPERIENCE_BUCKETS], dashboard.EXPERIENCE_BOUNDS, max_age)
+
+
+async def measure(name, func, max_age, repeat):
+    timings, peaks = [], []
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = await func(db, max_age)
+            timings.append(time.perf_counter() - start)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    timings.sort()
+    print(f"{name:<8} médiane={timings[len(timings) // 2] * 1000:8.2f}ms  pic mémoire={max(peaks) / 1024:10.1f} KiB  {result}")
+    return result
+
+
+async def main(max_age, repeat):
+    legacy = await measure("python", python_buckets, max_age, repeat)
+    sql = await measure("sql", climber_service._get_climbers_by_experience_sql, max_age, repeat)
+    async with AsyncSessionLocal() as db:
+        await snapshot.climbers.load(db)
+    copy = await measure("copie", snapshot_buckets, max_age, repeat)
+    assert legacy == sql == copy, "Les trois implémentations doivent renvoyer les mêmes comptes"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-age", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.max_age, args.repeat))
@@ -0,0 +1,72 @@
+"""
+Charge concurrente sur /auth/token.
+
+N clients se connectent en boucle pendant qu'une sonde interroge "/" toutes les
+10 ms : le débit de connexions mesure le coût du hachage, la latence de la sonde
+montre si la boucle d'événements reste disponible pendant les vérifications.
+À lancer contre une API démarrée, en faisant varier PASSWORD_HASH_WORKERS :
+
+    python -m benchmarks.login_load --base-url http://localhost:5000 --concurrency 20 \
+        --username Carlos --password 1234
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+
+def _quantiles(latencies: list) -> str:
+    if len(latencies) < 2:
+        return "pas assez de mesures"
+    quantiles = statistics.quantiles(latencies, n=100)
+    return f"p50={quantiles[49] * 1000:.1f}ms p95={quantiles[94] * 1000:.1f}ms p99={quantiles[98] * 1000:.1f}ms"
+
+
+async def _login_client(client: httpx.AsyncClient, credentials: dict, logins: int, latencies: list, statuses: Counter):
+    for _ in range(logins):
+        start = time.perf_counter()
+        response = await client.post("/auth/token", json=credentials)
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status_code] += 1
+
+
+async def _probe(client: httpx.AsyncClient, latencies: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/")
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def run(base_url: str, concurrency: int, logins: int, credentials: dict):
+    login_latencies, probe_latencies, statuses = [], [], Counter()
+    limits = httpx.Limits(max_connections=concurrency + 1)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe(client, probe_latencies, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            _login_client(client, credentials, logins, login_latencies, statuses) for _ in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+
+    print(f"{len(login_latencies)} connexions en {elapsed:.2f}s ({len(login_latencies) / elapsed:.1f} connexions/s)")
+    print(f"statuts : {dict(statuses)}")
+    print(f"connexion : {_quantiles(login_latencies)}")
+    print(f"sonde /   : {_quantiles(probe_latencies)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--logins", type=int, default=10, help="Connexions par client")
+    parser.add_argument("--username", default="Carlos")
+    parser.add_argument("--password", default="1234")
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.concurrency, args.logins, {"username": args.username, "password": args.password}))
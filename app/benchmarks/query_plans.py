@@ -0,0 +1,118 @@
+"""
+Vérifie, via EXPLAIN, que les requêtes des services utilisent bien un index.
+
+Chaque scénario appelle une vraie fonction de service ; les requêtes SQL qu'elle
+envoie sont capturées puis expliquées par la base (EXPLAIN QUERY PLAN sur SQLite,
+EXPLAIN sur PostgreSQL). Le script affiche le plan retenu et se termine en
+erreur si une requête parcourt toute la table ; tests/test_query_plans.py fait la même
+vérification dans la suite pytest.
+
+Les plans sont ceux que choisit le planificateur avec ses réglages par défaut : sur
+PostgreSQL, lancer le script sur une base de taille réaliste (benchmarks.suite
+--scale 100k), une petite table étant plus vite lue en entier que par un index.
+
+    python -m benchmarks.query_plans
+"""
+import asyncio
+import sys
+
+from sqlalchemy import event
+
+import schemas
+from database import AsyncSessionLocal, async_engine
+from services import climbers as climber_service
+from services import routes as route_service
+
+# (nom, appel du service) : requêtes dont le plan doit passer par un index.
+# Les statistiques du dashboard appellent leur requête SQL directement : une fois la copie
+# en mémoire chargée (démarrage de l'API), les fonctions publiques n'interrogent plus la base.
+# filter_by_sex n'y figure pas : sex est binaire et renvoie la moitié de la table,
+# un parcours séquentiel (en flux, voir routers.streaming) reste le bon plan.
+SCENARIOS = [
+    ("search pays+sexe+âge", lambda db: climber_service.search_climbers(
+        db, schemas.ClimberSearch(country=["FRA"], sex=1, min_age=20, max_age=30))),
+    ("search taille", lambda db: climber_service.search_climbers(
+        db, schemas.ClimberSearch(min_height=160, max_height=170))),
+    ("search poids", lambda db: climber_service.search_climbers(
+        db, schemas.ClimberSearch(min_weight=50, max_weight=55))),
+    ("search expérience", lambda db: climber_service.search_climbers(
+        db, schemas.ClimberSearch(min_years_cl=30, sort="years_cl"))),
+    ("search grades_max", lambda db: climber_service.search_climbers(
+        db, schemas.ClimberSearch(min_grades_max=75, sort="-grades_max"))),
+    ("countries", lambda db: climber_service.get_country(db)),
+    ("by_country", lambda db: climber_service.get_climbers_by_country(db, "FRA")),
+    ("filter_height", lambda db: climber_service.get_climbers_by_height(db, 190, 200)),
+    ("filter_weight", lambda db: climber_service.get_climbers_by_weight(db, 90, 100)),
+    ("filter_age", lambda db: climber_service.get_climbers_by_age(db, 55, 58)),
+    ("filter_experience", lambda db: climber_service.get_climbers_by_years_climbing(db, 30, 40)),
+    ("dashboard genres", lambda db: climber_service._get_climbers_by_genders_sql(db, 30)),
+    ("dashboard expérience", lambda db: climber_service._get_climbers_by_experience_sql(db, 30)),
+    ("dashboard pays", lambda db: climber_service._get_climbers_by_countries_sql(db, 30, 6)),
+    ("dashboard grades par âge", lambda db: climber_service._get_grades_by_age_sql(db, 30)),
+    ("routes par pays", lambda db: route_service.get_routes_by_country(db, "FRA")),
+    ("meilleures routes", lambda db: route_service.get_top_routes_by_grade(db, 10)),
+    ("meilleures routes d'un pays", lambda db: route_service.get_best_route_by_country(db, "FRA", 5)),
+]
+
+# Marqueurs d'un accès par index dans la sortie d'EXPLAIN
+INDEX_MARKERS = {
+    "sqlite": ("USING INDEX", "USING COVERING INDEX", "USING INTEGER PRIMARY KEY"),
+    "postgresql": ("Index Scan", "Index Only Scan", "Bitmap Index Scan"),
+}
+
+
+async def capture(scenario) -> list:
+    """Exécute un scénario et retourne les requêtes (sql, paramètres) envoyées à la base."""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    try:
+        async with AsyncSessionLocal() as db:
+            try:
+                await scenario(db)
+            except Exception:
+                pass  # Un 404 (table vide) n'empêche pas d'expliquer la requête
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", on_execute)
+    return statements
+
+
+async def explain(conn, statement: str, parameters) -> str:
+    if async_engine.dialect.name == "sqlite":
+        rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).all()
+        return "\n".join(row[-1] for row in rows)
+    rows = (await conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)).all()
+    return "\n".join(row[0] for row in rows)
+
+
+async def check_plans() -> list:
+    """Plan de chaque requête des scénarios : [(scénario, plan, passe par un index)]."""
+    markers = INDEX_MARKERS[async_engine.dialect.name]
+    results = []
+    async with async_engine.connect() as conn:
+        for name, scenario in SCENARIOS:
+            for statement, parameters in await capture(scenario):
+                plan = await explain(conn, statement, parameters)
+                results.append((name, plan, any(marker in plan for marker in markers)))
+    return results
+
+
+async def main() -> int:
+    failures = []
+    for name, plan, uses_index in await check_plans():
+        print(f"[{'OK' if uses_index else 'SCAN'}] {name}\n    " + plan.replace("\n", "\n    "))
+        if not uses_index:
+            failures.append(name)
+
+    if failures:
+        print(f"\n{len(failures)} requête(s) sans index : {', '.join(failures)}")
+        return 1
+    print(f"\nLes {len(SCENARIOS)} scénarios utilisent un index.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,65 @@
+"""
+Compare la recommandation de routes en SQL (filtre sur grade_mean, tri par rating_tot)
+et par l'index en mémoire (services.recommendations), pour un grimpeur puis pour un lot :
+appels unitaires successifs contre la variante vectorisée.
+
+    python -m benchmarks.recommendations --climbers 1000 --country FRA
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+
+import models
+from database import AsyncSessionLocal
+from services import recommendations
+
+
+async def sql_recommend(db, level, country, window, limit):
+    query = select(models.Route.name_id).where(models.Route.grade_mean.between(level - window, level + window))
+    if country:
+        query = query.where(models.Route.country == country)
+    return list(await db.scalars(query.order_by(models.Route.rating_tot.desc()).limit(limit)))
+
+
+def _report(name, elapsed, count):
+    print(f"{name:<28} {elapsed * 1000:9.1f}ms  ({elapsed / count * 1e6:8.1f}µs par grimpeur)")
+
+
+async def main(climbers, country, window, limit):
+    async with AsyncSessionLocal() as db:
+        levels = dict((await db.execute(
+            select(models.Climber.climber_id, models.Climber.grades_max).order_by(models.Climber.climber_id).limit(climbers)
+        )).all())
+        await recommendations._ensure_loaded(db)
+        recommendations.route_index.recommend(0, country, window, limit)  # Construction de l'index
+
+        start = time.perf_counter()
+        expected = [await sql_recommend(db, level, country, window, limit) for level in levels.values()]
+        _report("sql", time.perf_counter() - start, len(levels))
+
+        routes = recommendations.snapshot.routes
+        start = time.perf_counter()
+        unitary = [recommendations.route_index.recommend(level, country, window, limit) for level in levels.values()]
+        _report("index, appels unitaires", time.perf_counter() - start, len(levels))
+
+        start = time.perf_counter()
+        vectorized = recommendations.route_index.recommend_many(list(levels.values()), country, window, limit)
+        _report("index, passe vectorisée", time.perf_counter() - start, len(levels))
+
+        ratings = routes.column("rating_tot")
+        for sql_ids, positions, batch_positions in zip(expected, unitary, vectorized):
+            # Les ex aequo peuvent être départagés différemment : on compare les notes obtenues
+            assert [ratings[routes.position(name_id)] for name_id in sql_ids] == ratings[positions].tolist()
+            assert positions.tolist() == batch_positions.tolist()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--climbers", type=int, default=1000)
+    parser.add_argument("--country", default=None)
+    parser.add_argument("--window", type=float, default=recommendations.RECOMMENDATION_WINDOW)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.climbers, args.country, args.window, args.limit))
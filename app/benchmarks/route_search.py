@@ -0,0 +1,102 @@
+"""
+Latence de la recherche de routes en mémoire (services.route_search) sur des routes
+synthétiques (benchmarks.synthetic), sans base de données : la copie en colonnes est
+remplie directement, puis l'index trigrammes est construit.
+
+Les requêtes imitent une saisie d'autocomplétion : début (3 à 12 caractères) d'un nom de
+route, de site ou de secteur existant, avec une faute de frappe une fois sur trois. Le
+script affiche la construction de l'index, les latences p50/p95/p99 et se termine en
+erreur si le p99 dépasse --target-ms. Les qualités de correspondance sont vérifiées
+contre un calcul direct sur quelques requêtes.
+
+    python -m benchmarks.route_search --routes 1000000 --queries 2000
+"""
+import argparse
+import math
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from benchmarks import synthetic
+from services import route_search, snapshot
+
+
+def _queries(rng: np.random.Generator, routes: snapshot.ColumnarSnapshot, count: int) -> list:
+    queries = []
+    for _ in range(count):
+        column = route_search.SEARCH_COLUMNS[rng.integers(0, len(route_search.SEARCH_COLUMNS))]
+        value = routes.dictionaries[column][routes.column(column)[rng.integers(0, routes.size)]]
+        query = value[:rng.integers(3, 13)]
+        if rng.random() < 1 / 3 and len(query) > 3:
+            typo = rng.integers(1, len(query))
+            query = query[:typo] + "aeiou"[rng.integers(0, 5)] + query[typo + 1:]
+        queries.append(query)
+    return queries
+
+
+def _check(index: route_search.RouteSearchIndex, queries: list):
+    """Valeurs retenues et qualités de l'index identiques à un calcul direct sur chaque valeur distincte."""
+    threshold = route_search.ROUTE_SEARCH_MIN_SIMILARITY
+    for query in queries:
+        grams = route_search.trigrams(query)
+        for column in route_search.SEARCH_COLUMNS:
+            expected = {}
+            for value_id, value in enumerate(index.routes.dictionaries[column]):
+                similarity = len(grams & route_search.trigrams(value)) / len(grams)
+                if similarity >= threshold - 1e-9:
+                    expected[value_id] = similarity
+            value_ids, overlap = index._index(column).matches(grams, math.ceil(threshold * len(grams) - 1e-9))
+            assert value_ids.tolist() == list(expected), f"{query!r} ({column})"
+            assert np.allclose(overlap / len(grams), list(expected.values())), f"{query!r} ({column})"
+
+
+def main(count, queries, limit, seed, target_ms):
+    start = time.perf_counter()
+    rows = [
+        row for chunk in synthetic.routes(count, seed)
+        for row in chunk[[column.name for column in snapshot.routes.table_columns]].itertuples(index=False)
+    ]
+    routes = snapshot.ColumnarSnapshot(snapshot.routes.model)
+    routes.load_rows(rows)
+    del rows
+    print(f"copie : {routes.size} routes en {time.perf_counter() - start:.1f}s")
+
+    index = route_search.RouteSearchIndex(routes)
+    start = time.perf_counter()
+    index.warm_up()
+    distinct = {column: len(routes.dictionaries[column]) for column in route_search.SEARCH_COLUMNS}
+    print(f"index : construit en {time.perf_counter() - start:.1f}s, valeurs distinctes {distinct}")
+
+    rng = np.random.default_rng(seed)
+    calls = _queries(rng, routes, queries)
+    latencies, hits = [], 0
+    for query in calls:
+        start = time.perf_counter()
+        positions, _ = index.search(query, None, limit)
+        latencies.append(time.perf_counter() - start)
+        hits += len(positions) > 0
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    p99 = quantiles[98] * 1000
+    print(
+        f"{len(calls)} recherches : p50={quantiles[49] * 1000:.2f}ms  p95={quantiles[94] * 1000:.2f}ms  "
+        f"p99={p99:.2f}ms  (avec résultat : {hits / len(calls):.0%})"
+    )
+
+    if count <= 100_000:  # Le calcul direct parcourt toutes les valeurs distinctes
+        _check(index, calls[:5])
+    if p99 > target_ms:
+        sys.exit(f"p99 {p99:.2f}ms au-dessus de l'objectif {target_ms}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--routes", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--target-ms", type=float, default=20)
+    args = parser.parse_args()
+    main(args.routes, args.queries, args.limit, args.seed, args.target_ms)
@@ -0,0 +1,66 @@
+"""
+Coût CPU des réponses de liste : chemin ORM (hydratation des objets Climber, validation
+par le response_model puis encodage, comme FastAPI le fait) contre le chemin direct
+(lignes simples de services.streaming.fetch_rows encodées par orjson).
+Les temps sont ramenés à 1000 lignes, requête SQL comprise puis encodage seul.
+
+    python -m benchmarks.serialization --sex 0 --repeat 10
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+
+import schemas
+from database import AsyncSessionLocal
+from services import climbers as climber_service
+from services.streaming import fetch_rows
+
+climbers_adapter = TypeAdapter(List[schemas.Climber])
+
+
+async def orm_path(db, query):
+    records = (await db.scalars(query)).all()
+    start = time.process_time()
+    body = climbers_adapter.dump_json(climbers_adapter.validate_python(records, from_attributes=True))
+    return len(records), body, time.process_time() - start
+
+
+async def rows_path(db, query):
+    rows = await fetch_rows(db, query)
+    start = time.process_time()
+    body = orjson.dumps(rows)
+    return len(rows), body, time.process_time() - start
+
+
+async def measure(name, path, query, repeat):
+    totals, encodings = [], []
+    for _ in range(repeat):
+        async with AsyncSessionLocal() as db:
+            start = time.process_time()
+            count, body, encoding = await path(db, query)
+            totals.append(time.process_time() - start)
+            encodings.append(encoding)
+    per_1k = 1000 / max(count, 1)
+    total, encoding = min(totals) * per_1k, min(encodings) * per_1k
+    print(f"{name:<5} {count} lignes, {len(body) / 1024:.0f} KiB  CPU/1k lignes : total={total * 1000:7.2f}ms  encodage={encoding * 1000:7.2f}ms")
+    return body, total
+
+
+async def main(sex, repeat):
+    query = climber_service.climbers_by_sex_query(sex)
+    orm_body, orm_total = await measure("orm", orm_path, query, repeat)
+    rows_body, rows_total = await measure("rows", rows_path, query, repeat)
+    assert orjson.loads(orm_body) == orjson.loads(rows_body), "Les deux chemins doivent produire le même JSON"
+    print(f"CPU économisé : {(orm_total - rows_total) * 1000:.2f}ms pour 1000 lignes (x{orm_total / rows_total:.1f})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sex", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.sex, args.repeat))
@@ -0,0 +1,75 @@
+"""
+Compare les statistiques du dashboard calculées en SQL et sur la copie en colonnes des
+grimpeurs (services.snapshot) : latence médiane par fonction, résultats identiques, et
+mémoire occupée par la copie.
+
+    python -m benchmarks.snapshot_stats --repeat 20
+"""
+import argparse
+import asyncio
+import math
+import time
+
+from database import AsyncSessionLocal
+from services import climbers as climber_service
+from services import snapshot
+
+MAX_AGES = (20, 30, 45, 70)
+
+STATS = [
+    ("genres", lambda db, max_age: climber_service.get_climbers_by_genders(db, max_age)),
+    ("expérience", lambda db, max_age: climber_service.get_climbers_by_experience(db, max_age)),
+    ("pays", lambda db, max_age: climber_service.get_climbers_by_countries(db, max_age, 6)),
+    ("grades par âge", lambda db, max_age: climber_service.get_grades_by_age(db, max_age)),
+]
+
+
+def _same(left, right) -> bool:
+    """Égalité des résultats, à l'arrondi près pour les moyennes."""
+    if isinstance(left, list):
+        return len(left) == len(right) and all(
+            a["age"] == b["age"] and math.isclose(a["average_grade_max"], b["average_grade_max"])
+            for a, b in zip(left, right)
+        )
+    return left == right
+
+
+async def _median(func, db, max_age, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = await func(db, max_age)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings[len(timings) // 2], result
+
+
+async def main(repeat):
+    async with AsyncSessionLocal() as db:
+        start = time.perf_counter()
+        await snapshot.climbers.load(db)
+        print(
+            f"copie : {snapshot.climbers.size} grimpeurs chargés en {time.perf_counter() - start:.2f}s, "
+            f"{snapshot.climbers.nbytes() / 1024:.0f} KiB"
+        )
+        for name, func in STATS:
+            sql_total, numpy_total = 0.0, 0.0
+            for max_age in MAX_AGES:
+                snapshot.climbers.loaded = False
+                sql_time, sql_result = await _median(func, db, max_age, repeat)
+                snapshot.climbers.loaded = True
+                numpy_time, numpy_result = await _median(func, db, max_age, repeat)
+                assert _same(sql_result, numpy_result), f"{name} (max_age={max_age}) : résultats différents"
+                sql_total += sql_time
+                numpy_total += numpy_time
+            print(
+                f"{name:<15} sql={sql_total / len(MAX_AGES) * 1000:8.2f}ms  "
+                f"numpy={numpy_total / len(MAX_AGES) * 1000:8.2f}ms  (x{sql_total / numpy_total:.0f})"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.repeat))
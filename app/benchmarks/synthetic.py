@@ -0,0 +1,114 @@
+"""
+Jeux de données synthétiques pour les benchmarks, au schéma de data/climber_df.csv
+et de la table routes, générés par lots à partir d'une graine (reproductibles).
+
+Les distributions reprennent grossièrement celles du jeu réel (moyennes et écarts
+types des colonnes, répartition des pays si data/climber_df.csv est présent).
+"""
+import os
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+CLIMBERS_CSV = "data/climber_df.csv"
+DEFAULT_COUNTRIES = ["ESP", "USA", "other", "POL", "ITA", "SWE", "FRA", "DEU", "CZE", "NOR", "GBR", "AUT"]
+
+# Syllabes des noms inventés des routes, sites et secteurs, et taille du vocabulaire
+SYLLABLES = [
+    "ba", "be", "bi", "bo", "ca", "ce", "co", "cu", "da", "de", "di", "do", "fa", "fe", "fi", "ga", "go",
+    "la", "le", "li", "lo", "lu", "ma", "me", "mi", "mo", "na", "ne", "ni", "no", "pa", "pe", "pi", "po",
+    "ra", "re", "ri", "ro", "ru", "sa", "se", "si", "so", "ta", "te", "ti", "to", "va", "ve", "vi", "za",
+    "tra", "bri", "cla", "gno", "spi", "dru", "fle", "gra", "plo", "ar", "el", "on", "ix", "ur", "an",
+]
+VOCABULARY_SIZE = 20_000
+
+
+def _countries() -> pd.Series:
+    """Pays et fréquences observés dans le jeu réel, à défaut une répartition uniforme."""
+    if os.path.exists(CLIMBERS_CSV):
+        return pd.read_csv(CLIMBERS_CSV, usecols=["country"])["country"].value_counts(normalize=True)
+    return pd.Series(1 / len(DEFAULT_COUNTRIES), index=DEFAULT_COUNTRIES)
+
+
+def _normal_int(rng: np.random.Generator, mean: float, std: float, low: int, high: int, size: int) -> np.ndarray:
+    return np.clip(np.rint(rng.normal(mean, std, size)), low, high).astype(np.int64)
+
+
+def climbers(count: int, seed: int = 0, chunk_size: int = 10_000) -> Iterator[pd.DataFrame]:
+    """Grimpeurs synthétiques (colonnes de climber_df.csv, identifiants 1..count)."""
+    rng = np.random.default_rng(seed)
+    countries = _countries()
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        years_cl = _normal_int(rng, 12.7, 6.1, 1, 29, size)
+        year_last = _normal_int(rng, 2012, 4, 1991, 2017, size)
+        year_first = np.maximum(year_last - rng.integers(0, 8, size), 1991)
+        grades_first = _normal_int(rng, 45.6, 9.5, 28, 75, size)
+        grades_last = np.clip(grades_first + _normal_int(rng, 1.3, 5, -20, 20, size), 28, 77)
+        grades_max = np.maximum(np.maximum(grades_first, grades_last), _normal_int(rng, 53.8, 9.7, 29, 77, size))
+        date_first = pd.to_datetime(year_first.astype(str)) + pd.to_timedelta(rng.integers(0, 365, size), unit="D")
+        yield pd.DataFrame({
+            "user_id": np.arange(start + 1, start + size + 1),
+            "country": rng.choice(countries.index.to_numpy(), size=size, p=countries.to_numpy()),
+            "sex": (rng.random(size) < 0.125).astype(np.int64),
+            "height": _normal_int(rng, 176, 8.5, 137, 202, size),
+            "weight": _normal_int(rng, 67.6, 9.7, 40, 93, size),
+            "age": np.clip(np.rint(rng.normal(33.3, 7.6, size)), 12, 69).astype(float),
+            "years_cl": years_cl,
+            "date_first": date_first,
+            "date_last": date_first + pd.to_timedelta(rng.integers(30, 3000, size), unit="D"),
+            "grades_count": np.clip(rng.lognormal(3.6, 1.2, size), 1, 2445).astype(np.int64),
+            "grades_first": grades_first,
+            "grades_last": grades_last,
+            "grades_max": grades_max,
+            "grades_mean": (grades_first + grades_last + grades_max) / 3,
+            "year_first": year_first,
+            "year_last": year_last,
+        })
+
+
+def _words(rng: np.random.Generator, size: int) -> np.ndarray:
+    """Mots inventés de deux à quatre syllabes, pour des noms de routes, sites et secteurs variés."""
+    syllables = rng.choice(SYLLABLES, (size, 4))
+    lengths = rng.integers(2, 5, size)
+    return np.array(["".join(word[:length]).capitalize() for word, length in zip(syllables, lengths)], dtype=object)
+
+
+def _names(rng: np.random.Generator, words: np.ndarray, size: int) -> list:
+    """Noms d'un à trois mots tirés du vocabulaire."""
+    picks = rng.choice(words, (size, 3))
+    lengths = rng.integers(1, 4, size)
+    return [" ".join(name[:length]) for name, length in zip(picks, lengths)]
+
+
+def routes(count: int, seed: int = 0, chunk_size: int = 10_000) -> Iterator[pd.DataFrame]:
+    """
+    Routes synthétiques (colonnes de la table routes, identifiants 1..count). Les noms sont
+    faits de mots inventés, pour que la recherche par trigrammes (services.route_search)
+    travaille sur des textes aussi variés que des noms réels.
+    """
+    rng = np.random.default_rng(seed + 1)
+    countries = _countries()
+    words = _words(rng, VOCABULARY_SIZE)
+    crag_count = max(count // 50, 1)
+    crag_names = _names(rng, words, crag_count)
+    sector_names = _names(rng, words, crag_count * 10)
+    for start in range(0, count, chunk_size):
+        size = min(chunk_size, count - start)
+        ids = np.arange(start + 1, start + size + 1)
+        crags = rng.integers(0, crag_count, size)
+        sectors = crags * 10 + rng.integers(0, 10, size)
+        yield pd.DataFrame({
+            "name_id": ids,
+            "country": rng.choice(countries.index.to_numpy(), size=size, p=countries.to_numpy()),
+            "crag": [crag_names[crag] for crag in crags],
+            "sector": [sector_names[sector] for sector in sectors],
+            "name": _names(rng, words, size),
+            "tall_recommend_sum": rng.integers(-5, 6, size),
+            "grade_mean": np.round(np.clip(rng.normal(52, 8, size), 20, 80), 2),
+            "cluster": rng.integers(0, 6, size),
+            "rating_tot": np.round(np.clip(rng.normal(1.5, 1, size), -2, 5), 3),
+        })
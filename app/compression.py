@@ -0,0 +1,181 @@
+"""
+Compression des réponses (brotli ou gzip) négociée à partir de l'en-tête Accept-Encoding.
+
+Seuls les types textuels (JSON, NDJSON, CSV, texte) sont compressés, et une réponse
+complète plus petite que COMPRESSION_MIN_SIZE octets part telle quelle. Les réponses en
+flux (StreamingResponse) sont compressées morceau par morceau, chaque morceau étant
+vidé (flush) pour que le client reçoive les lignes au fil de l'eau.
+
+Une représentation compressée porte un ETag suffixé par son encodage ("<tag>-br") ;
+le suffixe est retiré des If-None-Match entrants, avant routers.cache.conditional.
+"""
+import os
+import time
+import zlib
+from typing import Optional
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+
+from metrics import COMPRESSION_BYTES, COMPRESSION_RATIO, COMPRESSION_SECONDS, COMPRESSION_SKIPPED
+
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get("COMPRESSION_GZIP_LEVEL", 6))
+# Qualité brotli modérée : les niveaux élevés coûtent trop de CPU pour du contenu dynamique
+COMPRESSION_BROTLI_QUALITY = int(os.environ.get("COMPRESSION_BROTLI_QUALITY", 4))
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+# Ordre de préférence à qualité égale dans Accept-Encoding
+ENCODINGS = ("br", "gzip")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Encodage retenu pour un en-tête Accept-Encoding (valeurs q comprises), ou None."""
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+    best, best_weight = None, 0.0
+    for coding in ENCODINGS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+class _Compressor:
+    """Compresseur incrémental d'une réponse, qui comptabilise octets et temps CPU."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31 : en-tête gzip
+        self.input_size = 0
+        self.output_size = 0
+        self.cpu_seconds = 0.0
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        start = time.thread_time()
+        if self.encoding == "br":
+            output = self._compressor.process(data)
+            output += self._compressor.finish() if final else self._compressor.flush()
+        else:
+            output = self._compressor.compress(data)
+            output += self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        self.cpu_seconds += time.thread_time() - start
+        self.input_size += len(data)
+        self.output_size += len(output)
+        return output
+
+    def observe(self):
+        COMPRESSION_SECONDS.labels(self.encoding).observe(self.cpu_seconds)
+        COMPRESSION_BYTES.labels(self.encoding, "input").inc(self.input_size)
+        COMPRESSION_BYTES.labels(self.encoding, "output").inc(self.output_size)
+        if self.input_size:
+            COMPRESSION_RATIO.labels(self.encoding).observe(self.output_size / self.input_size)
+
+
+def _strip_etag_suffixes(value: str) -> str:
+    tags = []
+    for tag in value.split(","):
+        tag = tag.strip()
+        for encoding in ENCODINGS:
+            if tag.endswith(f'-{encoding}"'):
+                tag = tag[: -len(encoding) - 2] + '"'
+                break
+        tags.append(tag)
+    return ", ".join(tags)
+
+
+class CompressionMiddleware:
+    """Middleware ASGI de compression des réponses HTTP (voir le docstring du module)."""
+
+    def __init__(self, app, min_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        request_headers = Headers(scope=scope)
+        encoding = negotiate(request_headers.get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            scope = dict(scope)
+            scope["headers"] = [
+                (name, _strip_etag_suffixes(value.decode("latin-1")).encode("latin-1") if name == b"if-none-match" else value)
+                for name, value in scope["headers"]
+            ]
+
+        pending_start = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal pending_start, compressor, passthrough
+            if passthrough:
+                return await send(message)
+            if message["type"] == "http.response.start":
+                pending_start = message  # Envoyé avec le premier morceau du corps, une fois la décision prise
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=pending_start["headers"])
+                skipped = self._skip_reason(pending_start["status"], headers, body, more_body)
+                if skipped is not None:
+                    if skipped != "not_applicable":
+                        COMPRESSION_SKIPPED.labels(skipped).inc()
+                    if pending_start["status"] == 304 and "etag" in headers and f'-{encoding}"' in (if_none_match or ""):
+                        headers["etag"] = headers["etag"][:-1] + f'-{encoding}"'
+                    passthrough = True
+                    await send(pending_start)
+                    return await send(message)
+
+                compressor = _Compressor(encoding)
+                payload = compressor.compress(body, final=not more_body)
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["etag"] = headers["etag"][:-1] + f'-{encoding}"'
+                if more_body:
+                    del headers["content-length"]
+                else:
+                    headers["content-length"] = str(len(payload))
+                await send(pending_start)
+            else:
+                payload = compressor.compress(body, final=not more_body)
+
+            await send({"type": "http.response.body", "body": payload, "more_body": more_body})
+            if not more_body:
+                compressor.observe()
+
+        await self.app(scope, receive, send_compressed)
+
+    def _skip_reason(self, status: int, headers: MutableHeaders, body: bytes, more_body: bool) -> Optional[str]:
+        """Raison de ne pas compresser la réponse, ou None pour la compresser."""
+        if status < 200 or status in (204, 304) or "content-encoding" in headers:
+            return "not_applicable"
+        if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+            return "content_type"
+        if not more_body and len(body) < self.min_size:
+            return "below_threshold"
+        return None
@@ -1,84 +1,124 @@
+import io
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Iterable
+
 import pandas as pd
-from sqlalchemy.orm import Session
-from database import SessionLocal, BaseSQL, engine
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from database import engine, run_migrations
 from models import Climber, User, Route
-from schemas import climbers, routes
-import uuid
+from services.passwords import PASSWORD_HASH_WORKERS, hash_password
+
+# Nombre de lignes lues dans le CSV puis envoyées à la base par lot
+CHUNK_SIZE = int(os.environ.get("INIT_DB_CHUNK_SIZE", 10000))
+
+
+def _prepare_users(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Hache les mots de passe du CSV et complète les colonnes générées côté Python (id, dates)."""
+    now = datetime.now()
+    chunk = chunk[["username", "password"]].astype(str)
+    with ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS) as executor:
+        chunk["password"] = list(executor.map(hash_password, chunk["password"]))
+    chunk.insert(0, "id", [uuid.uuid4() for _ in range(len(chunk))])
+    chunk["created_at"] = now
+    chunk["updated_at"] = now
+    return chunk
+
+
+def _prepare_climbers(chunk: pd.DataFrame) -> pd.DataFrame:
+    return chunk.rename(columns={"user_id": "climber_id"})
+
+
+# Description des chargements : (modèle, fichier CSV, transformation, colonnes dates)
+DATASETS = [
+    (User, "data/simple_users_generated.csv", _prepare_users, []),
+    (Climber, "data/climber_df.csv", _prepare_climbers, ["date_first", "date_last"]),
+    (Route, "data/routes_rated.csv", None, []),
+]
+
+
+def _is_seeded(conn: Connection, table) -> bool:
+    """Une table qui contient déjà au moins une ligne n'est pas rechargée."""
+    return conn.execute(select(1).select_from(table).limit(1)).first() is not None
 
-# Fonction pour initialiser la base de données
-def init_db():
-    # Créer les tables dans la base de données (si elles n'existent pas déjà)
-    BaseSQL.metadata.create_all(bind=engine)
 
-    # Démarrer une session
-    db: Session = SessionLocal()
+def _copy_chunk(conn: Connection, table, chunk: pd.DataFrame):
+    """Envoie un lot via COPY FROM STDIN (PostgreSQL uniquement)."""
+    buffer = io.StringIO()
+    chunk.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
 
+    columns = ", ".join(chunk.columns)
+    sql = f"COPY {table.name} ({columns}) FROM STDIN WITH (FORMAT csv)"
+    cursor = conn.connection.dbapi_connection.cursor()
     try:
-        # Charger les données des utilisateurs depuis le fichier CSV généré
-        user_data = pd.read_csv('data/simple_users_generated.csv')  # Chemin vers votre fichier CSV généré
-
-        # Ajouter les utilisateurs à la base de données
-        users = []
-        for _, row in user_data.iterrows():
-            user = User(
-                username=row['username'],
-                password=row['password']
-            )
-            db.add(user)
-            db.commit()  # Commit chaque utilisateur pour générer leur ID
-            users.append(user)
-
-        # Charger les données des grimpeurs
-        climber_data = pd.read_csv('data/climber_df.csv')
-
-        # Associer chaque grimpeur à un utilisateur existant (aléatoirement ici)
-        for i, row in climber_data.iterrows():
-            climber = Climber(
-                climber_id=row['user_id'],
-                country=row['country'],
-                sex=row['sex'],
-                height=row['height'],
-                weight=row['weight'],
-                age=row['age'],
-                years_cl=row['years_cl'],
-                date_first=row['date_first'],
-                date_last=row['date_last'],
-                grades_count=row['grades_count'],
-                grades_first=row['grades_first'],
-                grades_last=row['grades_last'],
-                grades_max=row['grades_max'],
-                grades_mean=row['grades_mean'],
-                year_first=row['year_first'],
-                year_last=row['year_last'],
-            )
-            db.add(climber)
-
-        # Charger les données des routes
-        route_data = pd.read_csv('data/routes_rated.csv')
-
-        # Ajouter les routes à la base de données
-        for _, row in route_data.iterrows():
-            route = Route(
-                name_id=row['name_id'],
-                country=row['country'],
-                crag=row['crag'],
-                sector=row['sector'],
-                name=row['name'],
-                tall_recommend_sum=row['tall_recommend_sum'],
-                grade_mean=row['grade_mean'],
-                cluster=row['cluster'],
-                rating_tot=row['rating_tot']
-            )
-            db.add(route)
-
-        # Commit des changements
-        db.commit()
-    
-    except Exception as e:
-        db.rollback()
-        print(f"Erreur lors de l'initialisation de la base de données : {e}")
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
     finally:
-        db.close()
+        cursor.close()
+
+
+def _insert_chunk(conn: Connection, table, chunk: pd.DataFrame):
+    """Envoie un lot via un executemany (autres moteurs)."""
+    records = chunk.astype(object).where(chunk.notna(), None).to_dict("records")
+    conn.execute(table.insert(), records)
+
+
+def load_chunks(model, chunks: Iterable[pd.DataFrame], prepare=None) -> int:
+    """
+    Insère des lots de lignes (DataFrames) dans la table du modèle, dans une seule transaction.
+    Ne fait rien si la table contient déjà des données. Retourne le nombre de lignes insérées.
+    """
+    table = model.__table__
+    columns = [column.name for column in table.columns]
+    write_chunk = _copy_chunk if engine.dialect.name == "postgresql" else _insert_chunk
+
+    start = time.perf_counter()
+    total = 0
+    with engine.begin() as conn:
+        if _is_seeded(conn, table):
+            print(f"[{table.name}] déjà initialisée, chargement ignoré")
+            return 0
+
+        for chunk in chunks:
+            if prepare is not None:
+                chunk = prepare(chunk)
+            chunk = chunk[[column for column in columns if column in chunk.columns]]
+            write_chunk(conn, table, chunk)
+            total += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else float("inf")
+    print(f"[{table.name}] {total} lignes chargées en {elapsed:.2f}s ({rate:,.0f} lignes/s)")
+    return total
+
+
+def load_table(model, csv_path: str, prepare=None, parse_dates=None) -> int:
+    """Charge un fichier CSV dans la table du modèle, par lots de CHUNK_SIZE lignes (voir load_chunks)."""
+    if not os.path.exists(csv_path):
+        print(f"[{model.__table__.name}] fichier {csv_path} introuvable, chargement ignoré")
+        return 0
+    return load_chunks(model, pd.read_csv(csv_path, chunksize=CHUNK_SIZE, parse_dates=parse_dates or False), prepare)
+
+
+# Fonction pour initialiser la base de données
+def init_db():
+    # Créer ou mettre à jour les tables et index via les migrations Alembic
+    run_migrations()
+
+    for model, csv_path, prepare, parse_dates in DATASETS:
+        try:
+            load_table(model, csv_path, prepare, parse_dates)
+        except Exception as e:
+            print(f"Erreur lors de l'initialisation de la table {model.__tablename__} : {e}")
 
 # Appeler la fonction d'initialisation
 if __name__ == "__main__":
@@ -0,0 +1,174 @@
+"""
+Instrumentation fine des requêtes HTTP : SQL, fonctions de service et sérialisation.
+
+- Chaque requête SQL est chronométrée via les événements du moteur SQLAlchemy et
+  rattachée à l'endpoint et à la fonction de service en cours (variables de contexte).
+- Les fonctions de service (instrument_services) mesurent leur durée, séparée en
+  temps SQL et temps Python (hydratation ORM, calculs).
+- InstrumentedRoute, la classe de route des routers, compte les requêtes SQL par
+  requête HTTP (un N+1 y apparaît comme un nombre élevé) et mesure la sérialisation
+  (validation du response_model et encodage JSON, après le retour de l'endpoint).
+  Les endpoints qui encodent eux-mêmes leur réponse (routers.streaming.json_response)
+  y ajoutent ce temps d'encodage par record_serialization.
+
+Les requêtes plus lentes que SLOW_QUERY_SECONDS sont journalisées avec leur SQL.
+"""
+import functools
+import inspect
+import logging
+import os
+import time
+from contextvars import ContextVar
+from types import ModuleType
+from typing import Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from metrics import (
+    DB_QUERIES_PER_REQUEST,
+    DB_QUERY_SECONDS,
+    DB_SECONDS_PER_REQUEST,
+    SERIALIZATION_SECONDS,
+    SERVICE_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_SECONDS = float(os.environ.get("SLOW_QUERY_SECONDS", 0.5))
+
+# Statistiques de la requête HTTP en cours, et fonction de service en cours d'exécution
+_request: ContextVar[Optional[dict]] = ContextVar("instrumentation_request", default=None)
+_service: ContextVar[Optional[dict]] = ContextVar("instrumentation_service", default=None)
+
+
+def _operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Début porté par le contexte d'exécution de la requête : rien ne reste sur la connexion
+    # quand la requête échoue (after_cursor_execute n'est alors pas appelé)
+    context._instrumentation_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._instrumentation_start
+    request, service = _request.get(), _service.get()
+    endpoint = request["endpoint"] if request else "-"
+    service_name = service["name"] if service else "-"
+
+    DB_QUERY_SECONDS.labels(endpoint, service_name, _operation(statement)).observe(elapsed)
+    if request is not None:
+        request["queries"] += 1
+        request["db_seconds"] += elapsed
+    if service is not None:
+        service["db_seconds"] += elapsed
+    if elapsed >= SLOW_QUERY_SECONDS:
+        logger.warning("Requête SQL lente (%.3fs) endpoint=%s service=%s : %s", elapsed, endpoint, service_name, statement)
+
+
+def instrument_engine(engine: AsyncEngine):
+    """Chronomètre toutes les requêtes SQL envoyées par le moteur."""
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _instrument_service(func):
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        frame = {"name": name, "db_seconds": 0.0}
+        token = _service.set(frame)
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            _service.reset(token)
+            SERVICE_SECONDS.labels(name, "db").observe(frame["db_seconds"])
+            SERVICE_SECONDS.labels(name, "python").observe(max(elapsed - frame["db_seconds"], 0.0))
+
+    return wrapper
+
+
+def instrument_services(*modules: ModuleType):
+    """
+    Remplace les fonctions async publiques définies dans chaque module par une version
+    chronométrée. Les appels passant par le module (climber_service.get_...) sont mesurés.
+    """
+    for module in modules:
+        for attribute, value in list(vars(module).items()):
+            if (
+                inspect.iscoroutinefunction(value)
+                and value.__module__ == module.__name__
+                and not attribute.startswith("_")
+            ):
+                setattr(module, attribute, _instrument_service(value))
+
+
+def _timed_endpoint(endpoint):
+    """Enveloppe l'endpoint pour noter l'instant où il rend la main à FastAPI."""
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_end()
+    else:
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _mark_endpoint_end()
+    return wrapper
+
+
+def record_serialization(seconds: float):
+    """Ajoute à la sérialisation de la requête en cours un encodage fait dans l'endpoint."""
+    request = _request.get()
+    if request is not None:
+        request["serialization_seconds"] += seconds
+
+
+def _mark_endpoint_end():
+    request = _request.get()
+    if request is not None:
+        request["endpoint_end"] = time.perf_counter()
+
+
+class InstrumentedRoute(APIRoute):
+    """
+    Route FastAPI qui publie, pour chaque requête, le nombre et la durée des requêtes SQL
+    ainsi que le temps de sérialisation de la réponse.
+    À passer aux routers : APIRouter(route_class=InstrumentedRoute).
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        path = self.path
+
+        async def instrumented_handler(request):
+            # Chaque requête HTTP s'exécute dans sa propre tâche : le contexte n'est pas
+            # réinitialisé, pour que les requêtes SQL d'une réponse en flux restent attribuées.
+            stats = {"endpoint": path, "queries": 0, "db_seconds": 0.0, "endpoint_end": None, "serialization_seconds": 0.0}
+            _request.set(stats)
+            try:
+                response = await handler(request)
+            finally:
+                DB_QUERIES_PER_REQUEST.labels(path).observe(stats["queries"])
+                DB_SECONDS_PER_REQUEST.labels(path).observe(stats["db_seconds"])
+            if stats["endpoint_end"] is not None:
+                after_endpoint = time.perf_counter() - stats["endpoint_end"]
+                SERIALIZATION_SECONDS.labels(path).observe(after_endpoint + stats["serialization_seconds"])
+            return response
+
+        return instrumented_handler
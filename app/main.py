@@ -1,12 +1,22 @@
 from typing import Optional
 from fastapi import FastAPI, Request, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import json
 import base64
 from starlette_exporter import PrometheusMiddleware, handle_metrics
-from models import engine
-from database import BaseSQL
+from database import AsyncSessionLocal, async_engine, run_migrations
+from instrumentation import instrument_engine, instrument_services
+from profiling import ProfilingMiddleware
+from compression import CompressionMiddleware
 import routers
+import services.auth
+import services.climbers
+import services.recommendations
+import services.route_search
+import services.routes
+import services.snapshot
+import services.users
 
 # Création de l'application FastAPI
 app = FastAPI(
@@ -46,20 +56,43 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Compression gzip / brotli des réponses, selon Accept-Encoding (voir compression.py)
+app.add_middleware(CompressionMiddleware)
+
 # Inclure les routers
 app.include_router(routers.AuthRouter)
 app.include_router(routers.UserRouter)
 app.include_router(routers.ClimberRouter)
 app.include_router(routers.RouteRouter)
+app.include_router(routers.GradeRouter)
 app.include_router(routers.HealthRouter)
+app.include_router(routers.ProfilingRouter)
 
 # Middleware Prometheus
 app.add_middleware(PrometheusMiddleware)
 app.add_route("/metrics", handle_metrics)
 
+# Profilage des requêtes lentes, inactif sauf PROFILING_ENABLED ou activation via /admin/profiling
+app.add_middleware(ProfilingMiddleware)
+
+# Temps SQL par endpoint et par fonction de service (voir instrumentation.py)
+instrument_engine(async_engine)
+instrument_services(services.auth, services.climbers, services.recommendations, services.route_search, services.routes, services.users)
+
 # Initialisation de la base de données au démarrage
 @app.on_event("startup")
 async def startup_event():
-    BaseSQL.metadata.create_all(bind=engine)
+    # Mise à jour du schéma (tables et index) par les migrations Alembic
+    await asyncio.to_thread(run_migrations)
+
+    # Construction des copies en colonnes (grimpeurs, routes), tenues à jour ensuite par
+    # les écritures ; le dashboard est calculé sur celle des grimpeurs
+    async with AsyncSessionLocal() as db:
+        await services.snapshot.climbers.load(db)
+        await services.snapshot.routes.load(db)
+    # Index de recherche des routes, construit d'avance quand il sert (hors PostgreSQL)
+    if services.route_search.backend() == "memory":
+        await asyncio.to_thread(services.route_search.route_search_index.warm_up)
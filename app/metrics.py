@@ -0,0 +1,112 @@
+"""
+Métriques Prometheus propres à l'application.
+
+Elles sont enregistrées dans le registre par défaut de prometheus_client et
+donc exposées par l'endpoint /metrics de starlette_exporter (voir main.py).
+"""
+from prometheus_client import Counter, Gauge, Histogram
+
+# Cache des réponses (routers/cache.py)
+CACHE_REQUESTS = Counter(
+    "response_cache_requests_total",
+    "Lectures du cache de réponses, par endpoint et résultat (hit / miss)",
+    ["endpoint", "result"],
+)
+CACHE_EVICTIONS = Counter(
+    "response_cache_evictions_total",
+    "Entrées retirées du cache de réponses, par raison (lru / ttl / invalidation)",
+    ["reason"],
+)
+CACHE_SIZE = Gauge(
+    "response_cache_entries",
+    "Nombre d'entrées présentes dans le cache de réponses",
+)
+
+
+# Requêtes conditionnelles (If-None-Match, routers/cache.conditional)
+CONDITIONAL_REQUESTS = Counter(
+    "http_conditional_requests_total",
+    "Requêtes GET avec ETag, par résultat (not_modified = 304 / modified = réponse complète)",
+    ["result"],
+)
+
+
+# Cache des tokens vérifiés (services.auth.verify_token)
+AUTH_TOKEN_CACHE = Counter(
+    "auth_token_cache_requests_total",
+    "Vérifications de token d'accès, par résultat du cache (hit / miss)",
+    ["result"],
+)
+
+
+# Pool de connexions du moteur asynchrone (database.InstrumentedAsyncPool)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds",
+    "Temps d'obtention d'une connexion du pool (attente, ouverture et pre-ping compris)",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "Demandes de connexion abandonnées après pool_timeout (pool saturé)",
+)
+DB_POOL_SIZE = Gauge("db_pool_size", "Taille configurée du pool de connexions")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connexions du pool actuellement utilisées")
+DB_POOL_OVERFLOW = Gauge("db_pool_overflow", "Connexions ouvertes au-delà de pool_size (max_overflow)")
+
+
+# Instrumentation des requêtes (instrumentation.py)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_seconds",
+    "Durée des requêtes SQL, par endpoint, fonction de service et type de requête",
+    ["endpoint", "service", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "Nombre de requêtes SQL par requête HTTP, par endpoint (un N+1 s'y voit en queue de distribution)",
+    ["endpoint"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 500),
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "db_seconds_per_request",
+    "Temps SQL cumulé par requête HTTP, par endpoint",
+    ["endpoint"],
+)
+SERVICE_SECONDS = Histogram(
+    "service_seconds",
+    "Durée des fonctions de service, séparée en temps SQL (db) et Python (hydratation ORM, calculs)",
+    ["service", "part"],
+)
+SERIALIZATION_SECONDS = Histogram(
+    "response_serialization_seconds",
+    "Sérialisation de la réponse : encodage JSON fait dans l'endpoint (json_response) et temps entre le retour de l'endpoint et la réponse prête (validation du response_model, encodage JSON)",
+    ["endpoint"],
+)
+
+# Compression des réponses (compression.py)
+COMPRESSION_RATIO = Histogram(
+    "response_compression_ratio",
+    "Taille compressée / taille d'origine des réponses, par encodage",
+    ["encoding"],
+    buckets=(0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.6, 0.8, 1),
+)
+COMPRESSION_SECONDS = Histogram(
+    "response_compression_cpu_seconds",
+    "Temps CPU passé à compresser chaque réponse, par encodage",
+    ["encoding"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+COMPRESSION_BYTES = Counter(
+    "response_compression_bytes_total",
+    "Octets avant (input) et après (output) compression, par encodage",
+    ["encoding", "stage"],
+)
+COMPRESSION_SKIPPED = Counter(
+    "response_compression_skipped_total",
+    "Réponses envoyées sans compression malgré un Accept-Encoding compatible, par raison",
+    ["reason"],
+)
+
+# Copies en colonnes des tables climbers et routes (services/snapshot.py)
+SNAPSHOT_ROWS = Gauge("snapshot_rows", "Nombre de lignes de la copie en colonnes, par table", ["table"])
+SNAPSHOT_BYTES = Gauge("snapshot_bytes", "Mémoire occupée par la copie en colonnes (tableaux et dictionnaires), par table", ["table"])
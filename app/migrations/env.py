@@ -0,0 +1,46 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+import models  # noqa: F401  (enregistre les tables dans BaseSQL.metadata)
+from database import BaseSQL, engine
+
+config = context.config
+
+# Configuration des logs, sans désactiver ceux d'uvicorn quand les migrations tournent au démarrage
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = BaseSQL.metadata
+
+
+def run_migrations_offline() -> None:
+    """Génère le SQL des migrations sans connexion (alembic upgrade head --sql)."""
+    context.configure(
+        url=engine.url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Applique les migrations avec le moteur synchrone de database.py."""
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,78 @@
+"""Schéma initial : tables users, climbers et routes
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 00:00:00
+
+Les bases créées auparavant par metadata.create_all possèdent déjà ces tables :
+elles sont alors laissées telles quelles.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "users",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False, unique=True),
+        sa.Column("password", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime()),
+        sa.Column("updated_at", sa.DateTime()),
+        if_not_exists=True,
+    )
+    op.create_index("ix_users_id", "users", ["id"], if_not_exists=True)
+
+    op.create_table(
+        "climbers",
+        sa.Column("climber_id", sa.Integer(), primary_key=True),
+        sa.Column("country", sa.String(), nullable=False),
+        sa.Column("sex", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Float(), nullable=False),
+        sa.Column("weight", sa.Float(), nullable=False),
+        sa.Column("age", sa.Float(), nullable=False),
+        sa.Column("years_cl", sa.Integer(), nullable=False),
+        sa.Column("date_first", sa.DateTime(), nullable=False),
+        sa.Column("date_last", sa.DateTime(), nullable=False),
+        sa.Column("grades_count", sa.Integer(), nullable=False),
+        sa.Column("grades_first", sa.Integer(), nullable=False),
+        sa.Column("grades_last", sa.Integer(), nullable=False),
+        sa.Column("grades_max", sa.Integer(), nullable=False),
+        sa.Column("grades_mean", sa.Float(), nullable=False),
+        sa.Column("year_first", sa.Integer(), nullable=False),
+        sa.Column("year_last", sa.Integer(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_climbers_climber_id", "climbers", ["climber_id"], if_not_exists=True)
+
+    op.create_table(
+        "routes",
+        sa.Column("name_id", sa.Integer(), primary_key=True),
+        sa.Column("country", sa.String(), nullable=False),
+        sa.Column("crag", sa.String(), nullable=False),
+        sa.Column("sector", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("tall_recommend_sum", sa.Integer(), nullable=False),
+        sa.Column("grade_mean", sa.Float(), nullable=False),
+        sa.Column("cluster", sa.Integer(), nullable=False),
+        sa.Column("rating_tot", sa.Float(), nullable=False),
+        if_not_exists=True,
+    )
+    op.create_index("ix_routes_name_id", "routes", ["name_id"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("routes")
+    op.drop_table("climbers")
+    op.drop_table("users")
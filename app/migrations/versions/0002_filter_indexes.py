@@ -0,0 +1,52 @@
+"""Index secondaires des filtres, recherches et agrégats du dashboard
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 00:00:01
+
+climbers :
+- (country, sex, age) : filtres par pays, recherche pays + sexe + âge, liste des pays
+- (age, sex, years_cl, grades_max, country) : couvre les quatre agrégats du dashboard
+  (filtre age <= max_age) et le filtre par âge, en lecture d'index seule
+- height, weight, years_cl, grades_max : filtres et recherches par intervalle
+routes :
+- (country, grade_mean) : routes d'un pays et meilleures routes d'un pays (parcours inverse)
+- grade_mean : meilleures routes toutes confondues
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ("ix_climbers_country_sex_age", "climbers", ["country", "sex", "age"]),
+    ("ix_climbers_age_dashboard", "climbers", ["age", "sex", "years_cl", "grades_max", "country"]),
+    ("ix_climbers_height", "climbers", ["height"]),
+    ("ix_climbers_weight", "climbers", ["weight"]),
+    ("ix_climbers_years_cl", "climbers", ["years_cl"]),
+    ("ix_climbers_grades_max", "climbers", ["grades_max"]),
+    ("ix_routes_country_grade_mean", "routes", ["country", "grade_mean"]),
+    ("ix_routes_grade_mean", "routes", ["grade_mean"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Remplacé par ix_climbers_age_dashboard (même préfixe, colonnes du dashboard incluses)
+    op.drop_index("ix_climbers_age", table_name="climbers", if_exists=True)
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    for table in ("climbers", "routes"):
+        op.execute(sa.text(f"ANALYZE {table}"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
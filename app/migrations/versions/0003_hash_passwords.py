@@ -0,0 +1,73 @@
+"""Hachage (scrypt) des mots de passe encore stockés en clair
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 00:00:02
+
+Migration de données : les utilisateurs dont le mot de passe n'est pas encore une
+empreinte scrypt sont relus par lots, hachés en parallèle dans un pool de threads
+(hashlib.scrypt libère le GIL) puis réécrits avec un UPDATE par lot (executemany).
+Les connexions avec un ancien mot de passe en clair restent acceptées et sont
+réécrites à la volée (services.auth), la migration peut donc être rejouée sans risque.
+Pas de retour arrière : une empreinte ne redonne pas le mot de passe.
+"""
+import base64
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+WORKERS = min(4, os.cpu_count() or 1)
+
+# Paramètres figés de la migration, indépendants de services.passwords (qui peut évoluer) :
+# même format d'empreinte, les connexions réécrivent ensuite l'empreinte si les paramètres
+# de l'application diffèrent (services.passwords.needs_rehash)
+PREFIX = "scrypt"
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2 ** 14, 8, 1
+SALT_SIZE = 16
+HASH_SIZE = 32
+
+
+def hash_password(password: str) -> str:
+    """Empreinte scrypt$<n>$<r>$<p>$<sel base64>$<empreinte base64>, avec un sel aléatoire."""
+    salt = os.urandom(SALT_SIZE)
+    digest = hashlib.scrypt(
+        password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P,
+        maxmem=256 * SCRYPT_N * SCRYPT_R * SCRYPT_P, dklen=HASH_SIZE,
+    )
+    return "$".join([PREFIX, str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P), base64.b64encode(salt).decode(), base64.b64encode(digest).decode()])
+
+users = sa.table(
+    "users",
+    sa.column("id"),
+    sa.column("password", sa.String),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    plaintext = sa.select(users.c.id, users.c.password).where(users.c.password.not_like(f"{PREFIX}$%"))
+    update = users.update().where(users.c.id == sa.bindparam("user_id")).values(password=sa.bindparam("hashed"))
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        while True:
+            rows = conn.execute(plaintext.limit(BATCH_SIZE)).all()
+            if not rows:
+                break
+            hashed = executor.map(hash_password, [password for _, password in rows])
+            conn.execute(update, [{"user_id": user_id, "hashed": value} for (user_id, _), value in zip(rows, hashed)])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
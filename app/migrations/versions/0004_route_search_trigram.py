@@ -0,0 +1,44 @@
+"""Index trigrammes (pg_trgm) de la recherche de routes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 00:00:03
+
+routes :
+- name, crag, sector : index GIN gin_trgm_ops, pour l'opérateur <% (word_similarity) de
+  GET /routes/search (services.route_search)
+
+PostgreSQL uniquement : les autres moteurs utilisent l'index en mémoire de services.route_search.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ("name", "crag", "sector")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for column in COLUMNS:
+        op.execute(sa.text(
+            f"CREATE INDEX IF NOT EXISTS ix_routes_{column}_trgm ON routes USING gin ({column} gin_trgm_ops)"
+        ))
+    op.execute(sa.text("ANALYZE routes"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for column in reversed(COLUMNS):
+        op.execute(sa.text(f"DROP INDEX IF EXISTS ix_routes_{column}_trgm"))
@@ -2,4 +2,4 @@ from .climbers import Climber
 from .routes import Route
 from .users import User
 
-from .db import get_db,engine
\ No newline at end of file
+from .db import get_db, get_sync_db, engine, async_engine
\ No newline at end of file
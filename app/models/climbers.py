@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Float, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from database import BaseSQL
@@ -24,5 +24,16 @@ class Climber(BaseSQL):
     year_first = Column(Integer, nullable=False)
     year_last = Column(Integer, nullable=False)
 
+    # Index secondaires des filtres, de la recherche composite et du dashboard
+    # (créés par la migration 0002, à garder synchronisés avec elle)
+    __table_args__ = (
+        Index("ix_climbers_country_sex_age", "country", "sex", "age"),
+        Index("ix_climbers_age_dashboard", "age", "sex", "years_cl", "grades_max", "country"),
+        Index("ix_climbers_height", "height"),
+        Index("ix_climbers_weight", "weight"),
+        Index("ix_climbers_years_cl", "years_cl"),
+        Index("ix_climbers_grades_max", "grades_max"),
+    )
+
     class Config:
         orm_mode = True
\ No newline at end of file
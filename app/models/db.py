@@ -1,9 +1,14 @@
-from database import SessionLocal, engine
+from database import SessionLocal, AsyncSessionLocal, engine, async_engine
 
 # Dependency
-def get_db():
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Session synchrone pour les scripts (init_db.py, ...)
+def get_sync_db():
     try:
         db = SessionLocal()
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, DateTime, Float, ForeignKey
+from sqlalchemy import Column, String, Integer, DateTime, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from database import BaseSQL
@@ -16,6 +16,13 @@ class Route(BaseSQL):
     cluster = Column(Integer, nullable=False)
     rating_tot = Column(Float, nullable=False)
 
+    # Index secondaires (créés par la migration 0002, à garder synchronisés avec elle).
+    # Les index trigrammes de la migration 0004, propres à PostgreSQL, ne sont pas déclarés ici.
+    __table_args__ = (
+        Index("ix_routes_country_grade_mean", "country", "grade_mean"),
+        Index("ix_routes_grade_mean", "grade_mean"),
+    )
+
     class Config:
         orm_mode = True
 
@@ -0,0 +1,168 @@
+"""
+Profilage par échantillonnage des requêtes lentes, activable à chaud.
+
+Quand le profilage est actif, un thread relève toutes les PROFILING_INTERVAL secondes
+la pile du thread de la boucle d'événements. Chaque pile est attribuée à la requête
+dont le middleware apparaît dans la chaîne des frames (les coroutines en attente les
+unes des autres y sont chaînées). À la fin d'une requête, son profil est conservé si
+elle a duré plus de PROFILING_SLOW_SECONDS ou si elle fait partie de la fraction
+PROFILING_SAMPLE_RATE tirée au hasard ; les PROFILING_BUFFER_SIZE derniers profils
+restent en mémoire (routers/profiling.py).
+
+Désactivé (par défaut), le middleware se limite à un test d'attribut par requête et
+aucun thread ne tourne. Le code exécuté dans le pool de threads (endpoints `def`,
+hachage des mots de passe) n'apparaît pas dans les piles. Chaque worker a ses profils.
+"""
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILING_SLOW_SECONDS = float(os.environ.get("PROFILING_SLOW_SECONDS", 1.0))
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0.0))
+PROFILING_INTERVAL = float(os.environ.get("PROFILING_INTERVAL", 0.005))
+PROFILING_BUFFER_SIZE = int(os.environ.get("PROFILING_BUFFER_SIZE", 50))
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Échantillonneur de piles et tampon circulaire des profils conservés."""
+
+    def __init__(self):
+        self.enabled = False
+        self.slow_seconds = PROFILING_SLOW_SECONDS
+        self.sample_rate = PROFILING_SAMPLE_RATE
+        self.interval = PROFILING_INTERVAL
+        self.profiles: deque = deque(maxlen=PROFILING_BUFFER_SIZE)
+        self._ids = itertools.count(1)
+        self._active: Dict[int, Counter] = {}  # id de la frame du middleware -> piles relevées
+        self._loop_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def configure(self, enabled: bool, slow_seconds: Optional[float] = None, sample_rate: Optional[float] = None):
+        if slow_seconds is not None:
+            self.slow_seconds = slow_seconds
+        if sample_rate is not None:
+            self.sample_rate = sample_rate
+        self.enabled = enabled
+        if enabled and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        elif not enabled and self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._active.clear()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self._active or self._loop_thread is None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = []
+            while frame is not None:
+                samples = self._active.get(id(frame))
+                if samples is not None:
+                    samples[";".join(reversed(stack))] += 1
+                    break
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+
+    def begin(self, frame) -> Counter:
+        self._loop_thread = threading.get_ident()
+        samples = self._active[id(frame)] = Counter()
+        return samples
+
+    def end(self, frame, scope: dict, status: Optional[int], started_at: float, duration: float):
+        samples = self._active.pop(id(frame), None)
+        if samples is None:
+            return
+        if duration >= self.slow_seconds:
+            reason = "slow"
+        elif random.random() < self.sample_rate:
+            reason = "sampled"
+        else:
+            return
+        self.profiles.append({
+            "id": next(self._ids),
+            "reason": reason,
+            "started_at": datetime.fromtimestamp(started_at).isoformat(),
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "query": scope.get("query_string", b"").decode("latin-1"),
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "interval_ms": self.interval * 1000,
+            "samples": samples,
+        })
+
+    def get(self, profile_id: int) -> Optional[dict]:
+        return next((profile for profile in self.profiles if profile["id"] == profile_id), None)
+
+
+def collapsed(profile: dict) -> str:
+    """Profil au format « piles repliées » (flamegraph.pl, speedscope) : pile;pile;pile nombre."""
+    return "\n".join(f"{stack} {count}" for stack, count in profile["samples"].most_common())
+
+
+def function_stats(profile: dict) -> List[dict]:
+    """
+    Résumé par fonction à la manière de pstats : temps propre (fonction en haut de pile)
+    et temps cumulé (fonction présente dans la pile), estimés à partir des échantillons.
+    """
+    own, total = Counter(), Counter()
+    for stack, count in profile["samples"].items():
+        frames = stack.split(";")
+        own[frames[-1]] += count
+        for frame in set(frames):
+            total[frame] += count
+    interval = profile["interval_ms"]
+    return [
+        {"function": frame, "samples": count, "own_ms": own[frame] * interval, "cumulative_ms": count * interval}
+        for frame, count in total.most_common()
+    ]
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI qui délimite chaque requête HTTP pour le profiler."""
+
+    def __init__(self, app, profiler: SamplingProfiler = profiler):
+        self.app = app
+        self.profiler = profiler
+        if PROFILING_ENABLED:
+            profiler.configure(True)
+
+    async def __call__(self, scope, receive, send):
+        if not self.profiler.enabled or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        frame = sys._getframe()
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started_at, start = time.time(), time.perf_counter()
+        self.profiler.begin(frame)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.profiler.end(frame, scope, status, started_at, time.perf_counter() - start)
@@ -2,4 +2,6 @@ from .climbers import router as ClimberRouter
 from .routes import router as RouteRouter
 from .health import router as HealthRouter
 from .users import router as UserRouter
-from .auth import router as AuthRouter
\ No newline at end of file
+from .auth import router as AuthRouter
+from .profiling import router as ProfilingRouter
+from .grades import router as GradeRouter
@@ -1,20 +1,21 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import models
 from schemas.auth_token import AuthToken
-from schemas.users import User
-from services.auth import generate_access_token
+from schemas.users import UserLogin
+import services.auth as auth_service
+from instrumentation import InstrumentedRoute
 
-router = APIRouter(prefix="/auth")
+router = APIRouter(prefix="/auth", route_class=InstrumentedRoute)
 
 
 @router.post("/token", tags=["auth"])
 async def get_access_token(
-    user_login: User,
-    db: Session = Depends(models.get_db),
+    user_login: UserLogin,
+    db: AsyncSession = Depends(models.get_db),
 ) -> AuthToken:
-    access_token = generate_access_token(db=db, user_login=user_login)
+    access_token = await auth_service.generate_access_token(db=db, user_login=user_login)
     return AuthToken(
         access_token=access_token,
     )
@@ -0,0 +1,175 @@
+import functools
+import hashlib
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+from starlette.responses import Response
+
+from metrics import CACHE_EVICTIONS, CACHE_REQUESTS, CACHE_SIZE, CONDITIONAL_REQUESTS
+from services import changes
+
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 1024))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 300))
+# Les réponses peuvent être stockées mais doivent être revalidées (If-None-Match) à chaque usage
+HTTP_CACHE_CONTROL = os.environ.get("HTTP_CACHE_CONTROL", "public, no-cache")
+
+_MISSING = object()
+
+
+class ResponseCache:
+    """
+    Cache LRU borné, avec durée de vie, des valeurs renvoyées par les endpoints de lecture.
+
+    Chaque entrée mémorise les tables dont elle dépend et leur version au moment du calcul :
+    une écriture sur l'une de ces tables (services.changes.notify) retire l'entrée, et une
+    valeur calculée pendant une écriture concurrente n'est jamais stockée.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Tuple[str, ...], Any]]" = OrderedDict()
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key, "ttl")
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value, tables: Tuple[str, ...], computed_at: Tuple[int, ...]):
+        if changes.versions(tables) != computed_at:
+            return  # Une écriture a eu lieu pendant le calcul : la valeur est peut-être déjà périmée
+        self._entries[key] = (time.monotonic() + self.ttl, tables, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)), "lru")
+        CACHE_SIZE.set(len(self._entries))
+
+    def invalidate(self, table: str):
+        """Retire toutes les entrées qui dépendent de la table."""
+        for key in [key for key, (_, tables, _) in self._entries.items() if table in tables]:
+            self._remove(key, "invalidation")
+
+    def clear(self):
+        self._entries.clear()
+        CACHE_SIZE.set(0)
+
+    def _remove(self, key: Hashable, reason: str):
+        del self._entries[key]
+        CACHE_EVICTIONS.labels(reason).inc()
+        CACHE_SIZE.set(len(self._entries))
+
+
+response_cache = ResponseCache()
+for _table in ("climbers", "routes"):
+    changes.subscribe(_table, response_cache.invalidate)
+
+
+def _freeze(value) -> Hashable:
+    """Transforme les paramètres d'un endpoint en clé hashable."""
+    if isinstance(value, BaseModel):
+        value = value.model_dump()
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+class _EncodedBody(NamedTuple):
+    """Réponse déjà encodée (routers.streaming.json_response), conservée sans ses en-têtes."""
+    body: bytes
+    status_code: int
+    media_type: Optional[str]
+
+
+def _replay(value, kwargs: dict):
+    """Reconstruit une réponse encodée avec les en-têtes de la requête courante (ETag, ...)."""
+    if not isinstance(value, _EncodedBody):
+        return value
+    response = next((item for item in kwargs.values() if isinstance(item, Response)), None)
+    headers = response.headers if response is not None else None
+    return Response(value.body, value.status_code, headers=headers, media_type=value.media_type)
+
+
+def cached(*tables: str):
+    """
+    Décorateur d'endpoint de lecture : met en cache la valeur renvoyée, par endpoint et
+    paramètres de requête. `tables` liste les tables dont dépend le résultat.
+    Une Response renvoyée est conservée sous forme de corps encodé, sans ses en-têtes.
+    Les exceptions (404, ...) ne sont pas mises en cache.
+    """
+    def decorator(endpoint):
+        name = endpoint.__name__
+
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            params = {
+                key: value for key, value in kwargs.items()
+                if not isinstance(value, (AsyncSession, Request, Response))
+            }
+            key = (name, _freeze(params))
+            value = response_cache.get(key)
+            if value is not _MISSING:
+                CACHE_REQUESTS.labels(name, "hit").inc()
+                return _replay(value, kwargs)
+
+            CACHE_REQUESTS.labels(name, "miss").inc()
+            computed_at = changes.versions(tables)
+            value = await endpoint(*args, **kwargs)
+            stored = _EncodedBody(value.body, value.status_code, value.media_type) if isinstance(value, Response) else value
+            response_cache.set(key, stored, tables, computed_at)
+            return value
+
+        return wrapper
+    return decorator
+
+
+# Les compteurs de services.changes sont propres au processus : l'identifiant du processus
+# entre dans l'ETag pour qu'un tag émis par un autre worker ne soit jamais pris pour courant.
+_BOOT_ID = uuid.uuid4().hex
+
+
+def _if_none_match(header: str) -> set:
+    """Tags listés dans If-None-Match (les préfixes W/ sont ignorés, comparaison faible)."""
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+
+def conditional(*tables: str):
+    """
+    Dépendance des endpoints GET : calcule un ETag fort à partir de la version des tables
+    lues, du chemin, des paramètres et de l'en-tête Accept. Si le client présente ce tag
+    (If-None-Match), la requête se termine par un 304 avant l'exécution de l'endpoint ;
+    sinon ETag et Cache-Control sont ajoutés à la réponse.
+    """
+    async def dependency(request: Request, response: Response):
+        digest = hashlib.sha1(repr((
+            _BOOT_ID,
+            changes.versions(tables),
+            request.url.path,
+            sorted(request.query_params.multi_items()),
+            request.headers.get("accept", ""),
+        )).encode()).hexdigest()
+        headers = {"ETag": f'"{digest}"', "Cache-Control": HTTP_CACHE_CONTROL, "Vary": "Accept"}
+
+        client_tags = _if_none_match(request.headers.get("if-none-match", ""))
+        if headers["ETag"] in client_tags or "*" in client_tags:
+            CONDITIONAL_REQUESTS.labels("not_modified").inc()
+            raise HTTPException(status_code=304, headers=headers)
+
+        CONDITIONAL_REQUESTS.labels("modified").inc()
+        response.headers.update(headers)
+
+    return dependency
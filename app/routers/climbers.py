@@ -1,184 +1,256 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, List, Optional
 import schemas
 from models import get_db
 import services.climbers as climber_service
-from starlette.requests import Request
-from routers.utils import verify_autorization_header
+import services.dashboard as dashboard_service
+import services.grades as grade_service
+import services.recommendations as recommendation_service
+from routers.utils import require_auth, encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from routers.streaming import json_response, output_format, requested_fields, requested_grade_format, streaming_response
+from routers.cache import cached, conditional
+from instrumentation import InstrumentedRoute
 
-router = APIRouter()
-
-security = HTTPBearer()
+router = APIRouter(route_class=InstrumentedRoute)
 
 # Gestion des grimpeurs
-@router.get("/climbers/", response_model=List[schemas.Climber], tags=["Climbers"])
-async def get_all_climbers(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    """Endpoint pour obtenir tous les grimpeurs avec pagination."""
+@router.get("/climbers/", response_model=List[schemas.Climber], dependencies=[Depends(conditional("climbers"))], tags=["Climbers"])
+async def get_all_climbers(response: Response, skip: int = 0, limit: int = 10, after: Optional[str] = None, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint pour obtenir tous les grimpeurs avec pagination.
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor, à repasser dans `after`.
+    `fields` restreint les colonnes lues et renvoyées (climber_id est toujours inclus).
+    """
     if limit <= 0:
         raise HTTPException(status_code=400, detail="Limit must be greater than 0")
-    climbers = climber_service.get_all_climbers(db, skip=skip, limit=limit)
+    after_id = decode_cursor(after) if after else None
+    climbers = await climber_service.get_all_climbers(db, skip=skip, limit=limit, after=after_id, fields=fields)
     if not climbers:
         raise HTTPException(status_code=404, detail="No climbers found")
-    return climbers
+    if len(climbers) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(climbers[-1]["climber_id"])
+    return json_response(climbers, response, grade_format)
+
+@router.get("/climbers/search", response_model=List[dict], dependencies=[Depends(conditional("climbers"))], tags=["Climbers"])
+async def search_climbers(response: Response, search: Annotated[schemas.ClimberSearch, Query()], fmt: str = Depends(output_format), grade_format: str = Depends(requested_grade_format), db: AsyncSession = Depends(get_db)):
+    """
+    Recherche composite : combine pays, sexe et intervalles (min_/max_ sur age, height, weight,
+    years_cl, grades_max, grades_mean), avec tri (`sort=-grades_max,age`) et projection
+    (`fields=climber_id,country`). Exemple : ?country=FRA&sex=1&min_height=160&max_height=170&min_age=20&max_age=30
+    """
+    query = climber_service.search_climbers_query(search)
+    if fmt != "json":
+        return streaming_response(query, fmt, grade_format)
+    climbers = await climber_service.search_climbers(db, search)
+    if not climbers:
+        raise HTTPException(status_code=404, detail="No climbers found for the specified criteria")
+    return json_response(climbers, response, grade_format)
 
-@router.get("/climbers/{climber_id}", response_model=schemas.Climber, tags=["Climbers"])
-async def get_climber_by_id(climber_id: int, db: Session = Depends(get_db)):
-    """Endpoint pour obtenir un grimpeur par ID."""
+@router.get("/climbers/{climber_id}", response_model=schemas.Climber, dependencies=[Depends(conditional("climbers"))], tags=["Climbers"])
+@cached("climbers")
+async def get_climber_by_id(response: Response, climber_id: int, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), db: AsyncSession = Depends(get_db)):
+    """Endpoint pour obtenir un grimpeur par ID, éventuellement limité aux colonnes de `fields`."""
     if climber_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid climber ID")
-    climber = climber_service.get_climber_by_id(db, climber_id)
+    climber = await climber_service.get_climber_by_id(db, climber_id, fields)
     if not climber:
         raise HTTPException(status_code=404, detail="Climber not found")
-    return climber
+    return json_response(climber, response, grade_format)
+
+@router.get("/climbers/{climber_id}/recommended_routes", response_model=List[schemas.Route], dependencies=[Depends(conditional("climbers", "routes"))], tags=["Climbers"])
+async def get_recommended_routes(response: Response, climber_id: int, country: Optional[str] = None, window: Optional[float] = Query(None, ge=0), limit: int = Query(10, gt=0, le=100), grade_format: str = Depends(requested_grade_format), db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint pour obtenir les routes les mieux notées dont le grade est proche du grade maximum
+    du grimpeur (à `window` près), éventuellement limitées à un pays.
+    """
+    if climber_id <= 0:
+        raise HTTPException(status_code=400, detail="Invalid climber ID")
+    if window is None:
+        window = recommendation_service.RECOMMENDATION_WINDOW
+    routes = await recommendation_service.recommend_routes(db, climber_id, country, window, limit)
+    if routes is None:
+        raise HTTPException(status_code=404, detail="Climber not found")
+    return json_response(routes, response, grade_format)
+
+@router.post("/climbers/recommended_routes", response_model=schemas.RecommendationBatchResult, tags=["Climbers"])
+async def get_recommended_routes_batch(response: Response, batch: schemas.RecommendationBatch, grade_format: str = Depends(requested_grade_format), db: AsyncSession = Depends(get_db)):
+    """Endpoint pour obtenir en une requête les routes recommandées à plusieurs grimpeurs."""
+    window = recommendation_service.RECOMMENDATION_WINDOW if batch.window is None else batch.window
+    result = await recommendation_service.recommend_routes_batch(db, batch.climber_ids, batch.country, window, batch.limit)
+    if grade_format == "fra":
+        # Une route recommandée à plusieurs grimpeurs est le même dictionnaire : converti une fois
+        routes = {id(route): route for item in result["results"] for route in item["routes"]}
+        grade_service.add_french_grades(list(routes.values()))
+    return json_response(result, response)
 
-@router.post("/climbers/", dependencies=[Depends(security)], response_model=schemas.Climber, tags=["Climbers"])
-async def create_climber(request: Request, climber: schemas.Climber, db: Session = Depends(get_db)):
+@router.post("/climbers/", dependencies=[Depends(require_auth)], response_model=schemas.Climber, tags=["Climbers"])
+async def create_climber(climber: schemas.Climber, db: AsyncSession = Depends(get_db)):
     """Endpoint pour ajouter un nouveau grimpeur."""
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-    token = verify_autorization_header(auth_header)
-    if not token:
-        raise HTTPException(status_code=403, detail="Invalid authorization token")
-    new_climber = climber_service.create_climber(db, climber)
+    new_climber = await climber_service.create_climber(db, climber)
     if not new_climber:
         raise HTTPException(status_code=500, detail="Failed to create climber")
     return new_climber
 
-@router.put("/climbers/{climber_id}", dependencies=[Depends(security)], response_model=schemas.Climber, tags=["Climbers"])
-async def update_climber(request: Request, climber_id: int, updated_data: schemas.Climber, db: Session = Depends(get_db)):
+@router.post("/climbers/batch", dependencies=[Depends(require_auth)], response_model=schemas.BatchResult, tags=["Climbers"])
+async def apply_climber_batch(response: Response, batch: schemas.ClimberBatch, db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint pour appliquer un lot d'upserts et de suppressions en une seule transaction.
+    Le résultat de chaque élément est renvoyé ; un lot atomique annulé répond 409.
+    """
+    result = await climber_service.apply_climber_batch(db, batch)
+    if not result["committed"]:
+        response.status_code = 409
+    return result
+
+@router.put("/climbers/{climber_id}", dependencies=[Depends(require_auth)], response_model=schemas.Climber, tags=["Climbers"])
+async def update_climber(climber_id: int, updated_data: schemas.Climber, db: AsyncSession = Depends(get_db)):
     """Endpoint pour mettre à jour un grimpeur existant."""
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-    token = verify_autorization_header(auth_header)
-    if not token:
-        raise HTTPException(status_code=403, detail="Invalid authorization token")
     if climber_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid climber ID")
-    climber = climber_service.update_climber(db, climber_id, updated_data)
+    climber = await climber_service.update_climber(db, climber_id, updated_data)
     if not climber:
         raise HTTPException(status_code=404, detail="Climber not found")
     return climber
 
-@router.delete("/climbers/{climber_id}", dependencies=[Depends(security)], response_model=dict, tags=["Climbers"])
-async def delete_climber(request: Request, climber_id: int, db: Session = Depends(get_db)):
+@router.delete("/climbers/{climber_id}", dependencies=[Depends(require_auth)], response_model=dict, tags=["Climbers"])
+async def delete_climber(climber_id: int, db: AsyncSession = Depends(get_db)):
     """Endpoint pour supprimer un grimpeur."""
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-    token = verify_autorization_header(auth_header)
-    if not token:
-        raise HTTPException(status_code=403, detail="Invalid authorization token")
     if climber_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid climber ID")
-    if climber_service.delete_climber(db, climber_id):
+    if await climber_service.delete_climber(db, climber_id):
         return {"message": "Climber deleted successfully"}
     raise HTTPException(status_code=404, detail="Climber not found")
 
 # Gestion des filtres et données
-@router.get("/climbers/countries/", response_model=List[str], tags=["Climbers"])
-async def get_countries(db: Session = Depends(get_db)):
+@router.get("/climbers/countries/", response_model=List[str], dependencies=[Depends(conditional("climbers"))], tags=["Climbers"])
+@cached("climbers")
+async def get_countries(db: AsyncSession = Depends(get_db)):
     """Endpoint pour obtenir la liste des pays avec des grimpeurs."""
-    countries = climber_service.get_country(db)
+    countries = await climber_service.get_country(db)
     if not countries:
         raise HTTPException(status_code=404, detail="No countries found")
     return countries
 
-@router.get("/climbers/filter_by_sex/", response_model=List[schemas.Climber], tags=["Climbers"])
-async def get_climbers_by_sex(sex: int, db: Session = Depends(get_db)):
+@router.get("/climbers/filter_by_sex/", response_model=List[schemas.Climber], dependencies=[Depends(conditional("climbers"))], tags=["Climbers"])
+async def get_climbers_by_sex(response: Response, sex: int, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), fmt: str = Depends(output_format), db: AsyncSession = Depends(get_db)):
     """Endpoint pour obtenir tous les grimpeurs filtrés par sexe."""
     if sex not in [0, 1]:
         raise HTTPException(status_code=400, detail="Invalid sex value, must be 0 or 1")
-    climbers = climber_service.get_climbers_by_sex(db, sex)
+    if fmt != "json":
+        return streaming_response(climber_service.climbers_by_sex_query(sex, fields), fmt, grade_format)
+    climbers = await climber_service.get_climbers_by_sex(db, sex, fields)
     if not climbers:
         raise HTTPException(status_code=404, detail="No climbers found for the specified sex")
-    return climbers
+    return json_response(climbers, response, grade_format)
 
-@router.get("/climbers/filter_experience/", response_model=List[schemas.Climber], tags=["Climbers"])
-async def get_climbers_by_years_climbing(min_years: int = 0, max_years: int = 5, db: Session = Depends(get_db)):
+@router.get("/climbers/filter_experience/", response_model=List[schemas.Climber], dependencies=[Depends(conditional("climbers"))], tags=["Climbers"])
+async def get_climbers_by_years_climbing(response: Response, min_years: int = 0, max_years: int = 5, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), fmt: str = Depends(output_format), db: AsyncSession = Depends(get_db)):
     """Endpoint pour obtenir tous les grimpeurs filtrés par leur niveau d'expérience."""
     if min_years < 0 or max_years < min_years:
         raise HTTPException(status_code=400, detail="Invalid experience range")
-    climbers = climber_service.get_climbers_by_years_climbing(db, min_years, max_years)
+    if fmt != "json":
+        return streaming_response(climber_service.climbers_by_years_climbing_query(min_years, max_years, fields), fmt, grade_format)
+    climbers = await climber_service.get_climbers_by_years_climbing(db, min_years, max_years, fields)
     if not climbers:
         raise HTTPException(status_code=404, detail="No climbers found for the specified experience range")
-    return climbers
+    return json_response(climbers, response, grade_format)
 
-@router.get("/climbers/by_country/", response_model=List[schemas.Climber], tags=["Climbers"])
-async def get_climbers_by_country(country: str = "FRA", db: Session = Depends(get_db)):
+@router.get("/climbers/by_country/", response_model=List[schemas.Climber], dependencies=[Depends(conditional("climbers"))], tags=["Climbers"])
+async def get_climbers_by_country(response: Response, country: str = "FRA", fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), fmt: str = Depends(output_format), db: AsyncSession = Depends(get_db)):
     """Endpoint pour obtenir les grimpeurs venant d'un pays particulier (par défaut 'FRA')."""
     if not country:
         raise HTTPException(status_code=400, detail="Country is required")
-    climbers = climber_service.get_climbers_by_country(db, country)
+    if fmt != "json":
+        return streaming_response(climber_service.climbers_by_country_query(country, fields), fmt, grade_format)
+    climbers = await climber_service.get_climbers_by_country(db, country, fields)
     if not climbers:
         raise HTTPException(status_code=404, detail=f"No climbers found for country '{country}'")
-    return climbers
+    return json_response(climbers, response, grade_format)
 
-@router.get("/climbers/filter_height/", response_model=List[schemas.Climber], tags=["Climbers"])
-async def get_climbers_by_height(min_height: float = 190, max_height: float = 200, db: Session = Depends(get_db)):
+@router.get("/climbers/filter_height/", response_model=List[schemas.Climber], dependencies=[Depends(conditional("climbers"))], tags=["Climbers"])
+async def get_climbers_by_height(response: Response, min_height: float = 190, max_height: float = 200, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), fmt: str = Depends(output_format), db: AsyncSession = Depends(get_db)):
     """Endpoint pour obtenir les grimpeurs filtrés par leur taille."""
     if min_height < 0 or max_height < min_height:
         raise HTTPException(status_code=400, detail="Invalid height range")
-    climbers = climber_service.get_climbers_by_height(db, min_height, max_height)
+    if fmt != "json":
+        return streaming_response(climber_service.climbers_by_height_query(min_height, max_height, fields), fmt, grade_format)
+    climbers = await climber_service.get_climbers_by_height(db, min_height, max_height, fields)
     if not climbers:
         raise HTTPException(status_code=404, detail="No climbers found for the specified height range")
-    return climbers
+    return json_response(climbers, response, grade_format)
 
-@router.get("/climbers/filter_weight/", response_model=List[schemas.Climber], tags=["Climbers"])
-async def get_climbers_by_weight(min_weight: float = 90, max_weight: float = 100, db: Session = Depends(get_db)):
+@router.get("/climbers/filter_weight/", response_model=List[schemas.Climber], dependencies=[Depends(conditional("climbers"))], tags=["Climbers"])
+async def get_climbers_by_weight(response: Response, min_weight: float = 90, max_weight: float = 100, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), fmt: str = Depends(output_format), db: AsyncSession = Depends(get_db)):
     """Endpoint pour obtenir les grimpeurs filtrés par leur poids."""
     if min_weight < 0 or max_weight < min_weight:
         raise HTTPException(status_code=400, detail="Invalid weight range")
-    climbers = climber_service.get_climbers_by_weight(db, min_weight, max_weight)
+    if fmt != "json":
+        return streaming_response(climber_service.climbers_by_weight_query(min_weight, max_weight, fields), fmt, grade_format)
+    climbers = await climber_service.get_climbers_by_weight(db, min_weight, max_weight, fields)
     if not climbers:
         raise HTTPException(status_code=404, detail="No climbers found for the specified weight range")
-    return climbers
+    return json_response(climbers, response, grade_format)
 
-@router.get("/climbers/filter_age/", response_model=List[schemas.Climber], tags=["Climbers"])
-async def get_climbers_by_age(min_age: int = 55, max_age: int = 58, db: Session = Depends(get_db)):
+@router.get("/climbers/filter_age/", response_model=List[schemas.Climber], dependencies=[Depends(conditional("climbers"))], tags=["Climbers"])
+async def get_climbers_by_age(response: Response, min_age: int = 55, max_age: int = 58, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), fmt: str = Depends(output_format), db: AsyncSession = Depends(get_db)):
     """Endpoint pour obtenir les grimpeurs filtrés par leur âge."""
     if min_age < 0 or max_age < min_age:
         raise HTTPException(status_code=400, detail="Invalid age range")
-    climbers = climber_service.get_climbers_by_age(db, min_age, max_age)
+    if fmt != "json":
+        return streaming_response(climber_service.climbers_by_age_query(min_age, max_age, fields), fmt, grade_format)
+    climbers = await climber_service.get_climbers_by_age(db, min_age, max_age, fields)
     if not climbers:
         raise HTTPException(status_code=404, detail="No climbers found for the specified age range")
-    return climbers
+    return json_response(climbers, response, grade_format)
 
 # Dashboard Endpoints
-@router.get("/BarChart_Climbers_Genders/", response_model=dict, tags=["Dashboard"])
-async def get_climbers_by_genders(db: Session = Depends(get_db), max_age: int = Query(None)):
+@router.get("/BarChart_Climbers_Genders/", response_model=dict, dependencies=[Depends(conditional("climbers"))], tags=["Dashboard"])
+@cached("climbers")
+async def get_climbers_by_genders(db: AsyncSession = Depends(get_db), max_age: int = Query(None)):
     """Retourne les grimpeurs par genres avec une limite d'âge maximale optionnelle."""
-    data = climber_service.get_climbers_by_genders(db, max_age)
+    data = await climber_service.get_climbers_by_genders(db, max_age)
     if not data:
         raise HTTPException(status_code=404, detail="No data found for genders")
     return data
 
-@router.get("/PieChart_Climbers_Experience/", response_model=dict, tags=["Dashboard"])
-async def get_climbers_by_experience(db: Session = Depends(get_db), max_age: int = Query(None)):
-    """Retourne la répartition des grimpeurs par tranches d'années d'expérience."""
-    data = climber_service.get_climbers_by_experience(db, max_age)
+@router.get("/PieChart_Climbers_Experience/", response_model=dict, dependencies=[Depends(conditional("climbers"))], tags=["Dashboard"])
+@cached("climbers")
+async def get_climbers_by_experience(db: AsyncSession = Depends(get_db), max_age: int = Query(None), bounds: List[int] = Query(None)):
+    """
+    Retourne la répartition des grimpeurs par tranches d'années d'expérience.
+    `bounds` permet de choisir les bornes hautes des tranches (ex: ?bounds=2&bounds=5&bounds=10).
+    """
+    if bounds is not None and (bounds[0] < 0 or any(b <= a for a, b in zip(bounds, bounds[1:]))):
+        raise HTTPException(status_code=400, detail="Bounds must be positive and strictly increasing")
+    data = await climber_service.get_climbers_by_experience(db, max_age, bounds or dashboard_service.EXPERIENCE_BOUNDS)
     if not data:
         raise HTTPException(status_code=404, detail="No data found for experience levels")
     return data
 
-@router.get("/PieChart_Climbers_Countries/", response_model=dict, tags=["Dashboard"])
-async def get_climbers_by_countries(db: Session = Depends(get_db), max_age: int = Query(None), limit: int = 6):
+@router.get("/PieChart_Climbers_Countries/", response_model=dict, dependencies=[Depends(conditional("climbers"))], tags=["Dashboard"])
+@cached("climbers")
+async def get_climbers_by_countries(db: AsyncSession = Depends(get_db), max_age: int = Query(None), limit: int = 6):
     """Retourne la répartition des grimpeurs par pays."""
     if limit <= 0:
         raise HTTPException(status_code=400, detail="Limit must be greater than 0")
-    data = climber_service.get_climbers_by_countries(db, max_age, limit)
+    data = await climber_service.get_climbers_by_countries(db, max_age, limit)
     if not data:
         raise HTTPException(status_code=404, detail="No data found for climbers by countries")
     return data
 
-@router.get("/scatterGradesByAge", tags=["Dashboard"])
-async def get_average_grades_by_age(db: Session = Depends(get_db), max_age: int = Query(None)):
+@router.get("/scatterGradesByAge", dependencies=[Depends(conditional("climbers"))], tags=["Dashboard"])
+@cached("climbers")
+async def get_average_grades_by_age(db: AsyncSession = Depends(get_db), max_age: int = Query(None)):
     """Retourne les grades_max par âge en fonction de l'âge maximum spécifié."""
-    data = climber_service.get_grades_by_age(db, max_age)
+    data = await climber_service.get_grades_by_age(db, max_age)
     if not data:
         raise HTTPException(status_code=404, detail="No data found for grades by age")
     return data
 
+@router.get("/dashboard/summary", response_model=dict, dependencies=[Depends(conditional("climbers"))], tags=["Dashboard"])
+async def get_dashboard_summary(max_age: int = Query(None), limit: int = 6):
+    """Retourne en une seule réponse les données des quatre graphiques du dashboard."""
+    if limit <= 0:
+        raise HTTPException(status_code=400, detail="Limit must be greater than 0")
+    return dashboard_service.summary.summary(max_age, countries_limit=limit)
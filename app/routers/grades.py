@@ -0,0 +1,28 @@
+import os
+from typing import List
+
+import orjson
+from fastapi import APIRouter, HTTPException, Request, Response
+
+import schemas
+from services.grades import grade_table
+from instrumentation import InstrumentedRoute
+
+# La table des grades ne change qu'avec un déploiement : elle peut être gardée longtemps en cache
+GRADES_CACHE_CONTROL = os.environ.get("GRADES_CACHE_CONTROL", "public, max-age=86400")
+
+router = APIRouter(route_class=InstrumentedRoute)
+
+# Corps encodé une seule fois, au chargement du module
+_GRADES_BODY = orjson.dumps(grade_table.rows)
+
+@router.get("/grades", response_model=List[schemas.Grade], tags=["Grades"])
+async def get_grades(request: Request):
+    """
+    Endpoint pour obtenir la table de conversion des grades (grade_id -> cotation française).
+    La réponse porte un ETag tiré du fichier : un client qui le renvoie reçoit un 304.
+    """
+    headers = {"ETag": grade_table.etag, "Cache-Control": GRADES_CACHE_CONTROL}
+    if grade_table.etag in request.headers.get("if-none-match", ""):
+        raise HTTPException(status_code=304, headers=headers)
+    return Response(_GRADES_BODY, media_type="application/json", headers=headers)
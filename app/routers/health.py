@@ -1,9 +1,21 @@
-from fastapi import FastAPI, Header, Request, APIRouter
+from fastapi import FastAPI, Header, Request, APIRouter, Depends, Response
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
+import asyncio
 import base64
 import json
+import os
+import time
 
-router = APIRouter()
+from models import get_db, async_engine
+from instrumentation import InstrumentedRoute
+
+# Délai maximum (en secondes) de la requête de vérification de /health
+HEALTH_CHECK_TIMEOUT = float(os.environ.get("HEALTH_CHECK_TIMEOUT", 2))
+
+router = APIRouter(route_class=InstrumentedRoute)
 
 # Page d'accueil personnalisée
 @router.get("/")
@@ -25,8 +37,20 @@ def read_hello():
 
 
 @router.get("/health")
-def read_root():
-    return {"message": "Api is running fine!"}
+async def health_check(response: Response, db: AsyncSession = Depends(get_db)):
+    """Vérifie la base avec une requête minimale (SELECT 1) ; répond 503 si elle ne répond pas à temps."""
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.execute(text("SELECT 1")), timeout=HEALTH_CHECK_TIMEOUT)
+    except (asyncio.TimeoutError, SQLAlchemyError, OSError) as err:
+        response.status_code = 503
+        return {"message": "Database unavailable", "database": "down", "error": type(err).__name__}
+    return {
+        "message": "Api is running fine!",
+        "database": "up",
+        "database_latency_ms": round((time.perf_counter() - start) * 1000, 2),
+        "pool": async_engine.pool.status(),
+    }
 
 
 @router.get("/api/headers")
@@ -0,0 +1,59 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+
+from instrumentation import InstrumentedRoute
+from profiling import collapsed, function_stats, profiler
+from routers.utils import require_admin
+
+router = APIRouter(prefix="/admin/profiling", dependencies=[Depends(require_admin)], route_class=InstrumentedRoute)
+
+
+# Réglages du profiler modifiables à chaud (les champs absents sont inchangés)
+class ProfilingSettings(BaseModel):
+    enabled: bool
+    slow_seconds: Optional[float] = Field(None, ge=0)
+    sample_rate: Optional[float] = Field(None, ge=0, le=1)
+
+
+def _settings() -> dict:
+    return {
+        "enabled": profiler.enabled,
+        "slow_seconds": profiler.slow_seconds,
+        "sample_rate": profiler.sample_rate,
+        "interval_ms": profiler.interval * 1000,
+        "buffer_size": profiler.profiles.maxlen,
+    }
+
+
+@router.get("/", tags=["Admin"])
+async def get_profiling():
+    """Réglages du profiler et liste des profils conservés par ce worker (du plus récent au plus ancien)."""
+    profiles = [
+        {key: value for key, value in profile.items() if key != "samples"} | {"samples": sum(profile["samples"].values())}
+        for profile in reversed(profiler.profiles)
+    ]
+    return {"settings": _settings(), "profiles": profiles}
+
+
+@router.put("/", tags=["Admin"])
+async def configure_profiling(settings: ProfilingSettings):
+    """Active ou désactive le profiler et ajuste le seuil de lenteur et la fraction échantillonnée."""
+    profiler.configure(settings.enabled, settings.slow_seconds, settings.sample_rate)
+    return _settings()
+
+
+@router.get("/profiles/{profile_id}", tags=["Admin"])
+async def get_profile(profile_id: int, format: str = Query("collapsed", pattern="^(collapsed|stats)$")):
+    """
+    Un profil conservé, en piles repliées (format=collapsed, texte pour flamegraph.pl / speedscope)
+    ou en résumé par fonction façon pstats (format=stats).
+    """
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return PlainTextResponse(collapsed(profile))
+    return {key: value for key, value in profile.items() if key != "samples"} | {"functions": function_stats(profile)}
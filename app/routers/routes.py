@@ -1,110 +1,125 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import schemas
 from models import get_db
 import services.routes as route_service
-from starlette.requests import Request
-from routers.utils import verify_autorization_header
+import services.route_search as route_search_service
+from routers.utils import require_auth, encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+from routers.streaming import json_response, output_format, requested_fields, requested_grade_format, streaming_response
+from routers.cache import cached, conditional
+from instrumentation import InstrumentedRoute
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
-security = HTTPBearer()
-
-@router.get("/routes/", response_model=List[schemas.Route], tags=["Routes"])
-async def get_all_routes(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    """Endpoint pour obtenir toutes les routes avec pagination."""
+@router.get("/routes/", response_model=List[schemas.Route], dependencies=[Depends(conditional("routes"))], tags=["Routes"])
+async def get_all_routes(response: Response, skip: int = 0, limit: int = 10, after: Optional[str] = None, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint pour obtenir toutes les routes avec pagination.
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor, à repasser dans `after`.
+    `fields` restreint les colonnes lues et renvoyées (name_id est toujours inclus).
+    """
     if limit <= 0:
         raise HTTPException(status_code=400, detail="Limit must be greater than 0")
-    routes = route_service.get_all_routes(db, skip=skip, limit=limit)
+    after_id = decode_cursor(after) if after else None
+    routes = await route_service.get_all_routes(db, skip=skip, limit=limit, after=after_id, fields=fields)
     if not routes:
         raise HTTPException(status_code=404, detail="No routes found")
-    return routes
+    if len(routes) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(routes[-1]["name_id"])
+    return json_response(routes, response, grade_format)
+
+@router.get("/routes/search", response_model=List[schemas.RouteSearchResult], dependencies=[Depends(conditional("routes"))], tags=["Routes"])
+async def search_routes(response: Response, q: str = Query(..., min_length=2, max_length=100), country: Optional[str] = None, limit: int = Query(10, gt=0, le=50), grade_format: str = Depends(requested_grade_format), db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint d'autocomplétion : routes dont le nom, le site ou le secteur commence par `q` ou
+    lui ressemble (fautes de frappe tolérées), classées par qualité de correspondance et par
+    note. Renvoie une liste vide si rien ne correspond.
+    """
+    routes = await route_search_service.search_routes(db, q, country, limit)
+    return json_response(routes, response, grade_format)
 
-@router.get("/routes/{name_id}", response_model=schemas.Route, tags=["Routes"])
-async def get_route_by_id(name_id: int, db: Session = Depends(get_db)):
-    """Endpoint pour obtenir une route par ID."""
+@router.get("/routes/{name_id}", response_model=schemas.Route, dependencies=[Depends(conditional("routes"))], tags=["Routes"])
+@cached("routes")
+async def get_route_by_id(response: Response, name_id: int, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), db: AsyncSession = Depends(get_db)):
+    """Endpoint pour obtenir une route par ID, éventuellement limitée aux colonnes de `fields`."""
     if name_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid route ID")
-    route = route_service.get_route_by_id(db, name_id)
+    route = await route_service.get_route_by_id(db, name_id, fields)
     if route is None:
         raise HTTPException(status_code=404, detail="Route not found")
-    return route
+    return json_response(route, response, grade_format)
 
-@router.post("/routes/", dependencies=[Depends(security)], response_model=schemas.Route, tags=["Routes"])
-async def create_route(request: Request, route: schemas.RouteCreate, db: Session = Depends(get_db)):
+@router.post("/routes/", dependencies=[Depends(require_auth)], response_model=schemas.Route, tags=["Routes"])
+async def create_route(route: schemas.RouteCreate, db: AsyncSession = Depends(get_db)):
     """Endpoint pour ajouter une nouvelle route."""
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-    token = verify_autorization_header(auth_header)
-    if not token:
-        raise HTTPException(status_code=403, detail="Invalid authorization token")
-    new_route = route_service.create_route(db, route)
+    new_route = await route_service.create_route(db, route)
     if not new_route:
         raise HTTPException(status_code=500, detail="Failed to create the route")
     return new_route
 
-@router.put("/routes/{name_id}", dependencies=[Depends(security)], response_model=schemas.Route, tags=["Routes"])
-async def update_route(request: Request, name_id: int, updated_data: schemas.RouteCreate, db: Session = Depends(get_db)):
+@router.post("/routes/batch", dependencies=[Depends(require_auth)], response_model=schemas.BatchResult, tags=["Routes"])
+async def apply_route_batch(response: Response, batch: schemas.RouteBatch, db: AsyncSession = Depends(get_db)):
+    """
+    Endpoint pour appliquer un lot d'upserts et de suppressions en une seule transaction.
+    Le résultat de chaque élément est renvoyé ; un lot atomique annulé répond 409.
+    """
+    result = await route_service.apply_route_batch(db, batch)
+    if not result["committed"]:
+        response.status_code = 409
+    return result
+
+@router.put("/routes/{name_id}", dependencies=[Depends(require_auth)], response_model=schemas.Route, tags=["Routes"])
+async def update_route(name_id: int, updated_data: schemas.RouteCreate, db: AsyncSession = Depends(get_db)):
     """Endpoint pour mettre à jour une route existante."""
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-    token = verify_autorization_header(auth_header)
-    if not token:
-        raise HTTPException(status_code=403, detail="Invalid authorization token")
     if name_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid route ID")
-    route = route_service.update_route(db, name_id, updated_data)
+    route = await route_service.update_route(db, name_id, updated_data)
     if route is None:
         raise HTTPException(status_code=404, detail="Route not found")
     return route
 
-@router.delete("/routes/{name_id}", dependencies=[Depends(security)], response_model=dict, tags=["Routes"])
-async def delete_route(request: Request, name_id: int, db: Session = Depends(get_db)):
+@router.delete("/routes/{name_id}", dependencies=[Depends(require_auth)], response_model=dict, tags=["Routes"])
+async def delete_route(name_id: int, db: AsyncSession = Depends(get_db)):
     """Endpoint pour supprimer une route."""
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-    token = verify_autorization_header(auth_header)
-    if not token:
-        raise HTTPException(status_code=403, detail="Invalid authorization token")
     if name_id <= 0:
         raise HTTPException(status_code=400, detail="Invalid route ID")
-    if route_service.delete_route(db, name_id):
+    if await route_service.delete_route(db, name_id):
         return {"message": "Route deleted successfully"}
     raise HTTPException(status_code=404, detail="Route not found")
 
-@router.get("/routes/country/{country}", response_model=List[schemas.Route], tags=["Routes"])
-async def get_routes_by_country(country: str, db: Session = Depends(get_db)):
+@router.get("/routes/country/{country}", response_model=List[schemas.Route], dependencies=[Depends(conditional("routes"))], tags=["Routes"])
+async def get_routes_by_country(response: Response, country: str, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), fmt: str = Depends(output_format), db: AsyncSession = Depends(get_db)):
     """Endpoint pour obtenir les routes d'un pays spécifique."""
     if not country:
         raise HTTPException(status_code=400, detail="Country name is required")
-    routes = route_service.get_routes_by_country(db, country)
+    if fmt != "json":
+        return streaming_response(route_service.routes_by_country_query(country, fields), fmt, grade_format)
+    routes = await route_service.get_routes_by_country(db, country, fields)
     if not routes:
         raise HTTPException(status_code=404, detail=f"No routes found for country '{country}'")
-    return routes
+    return json_response(routes, response, grade_format)
 
-@router.get("/routes/top/", response_model=List[schemas.Route], tags=["Routes"])
-async def get_top_routes_by_grade(limit: int = 10, db: Session = Depends(get_db)):
+@router.get("/routes/top/", response_model=List[schemas.Route], dependencies=[Depends(conditional("routes"))], tags=["Routes"])
+@cached("routes")
+async def get_top_routes_by_grade(response: Response, limit: int = 10, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), db: AsyncSession = Depends(get_db)):
     """Endpoint pour obtenir les routes avec la meilleure note moyenne."""
     if limit <= 0:
         raise HTTPException(status_code=400, detail="Limit must be greater than 0")
-    routes = route_service.get_top_routes_by_grade(db, limit=limit)
+    routes = await route_service.get_top_routes_by_grade(db, limit=limit, fields=fields)
     if not routes:
         raise HTTPException(status_code=404, detail="No top routes found")
-    return routes
+    return json_response(routes, response, grade_format)
 
-@router.get("/routes/best_by_country/{country}", response_model=List[schemas.Route], tags=["Routes"])
-async def get_best_route_by_country(country: str, limit: int = 1, db: Session = Depends(get_db)):
+@router.get("/routes/best_by_country/{country}", response_model=List[schemas.Route], dependencies=[Depends(conditional("routes"))], tags=["Routes"])
+@cached("routes")
+async def get_best_route_by_country(response: Response, country: str, limit: int = 1, fields: List[str] = Depends(requested_fields), grade_format: str = Depends(requested_grade_format), db: AsyncSession = Depends(get_db)):
     """Endpoint pour obtenir les meilleures routes d'un pays spécifique."""
     if not country:
         raise HTTPException(status_code=400, detail="Country name is required")
     if limit <= 0:
         raise HTTPException(status_code=400, detail="Limit must be greater than 0")
-    routes = route_service.get_best_route_by_country(db, country, limit=limit)
+    routes = await route_service.get_best_route_by_country(db, country, limit=limit, fields=fields)
     if not routes:
         raise HTTPException(status_code=404, detail=f"No routes found for country '{country}'")
-    return routes
+    return json_response(routes, response, grade_format)
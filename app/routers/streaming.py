@@ -0,0 +1,103 @@
+import csv
+import io
+import time
+from typing import List, Optional
+
+import orjson
+from fastapi import Query
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import Select
+from starlette.requests import Request
+
+from instrumentation import record_serialization
+from services.grades import GRADE_COLUMNS, add_french_grades
+from services.streaming import selected_columns, stream_rows
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+ACCEPTED_MEDIA_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "text/csv": "csv",
+}
+
+
+def output_format(request: Request, format: Optional[str] = Query(None, pattern="^(json|ndjson|csv)$")) -> str:
+    """
+    Dépendance choisissant le format de sortie : `?format=` en priorité, sinon l'en-tête Accept.
+    Retourne "json" (réponse classique), "ndjson" ou "csv" (réponses en flux).
+    """
+    if format:
+        return format
+    for media_type in request.headers.get("accept", "").split(","):
+        fmt = ACCEPTED_MEDIA_TYPES.get(media_type.split(";")[0].strip())
+        if fmt:
+            return fmt
+    return "json"
+
+
+def requested_fields(
+    fields: Optional[str] = Query(None, description="Colonnes à renvoyer, séparées par des virgules (ex: climber_id,country)"),
+) -> List[str]:
+    """Dépendance lisant la projection `?fields=` ; les noms sont validés par le service (services.streaming.project)."""
+    return [name.strip() for name in fields.split(",") if name.strip()] if fields else []
+
+
+def requested_grade_format(
+    grade_format: Optional[str] = Query(None, pattern="^(id|fra)$", description="fra : ajoute la cotation française des grades (<colonne>_fra)"),
+) -> str:
+    """Dépendance lisant `?grade_format=` : "id" (grades numériques seuls, par défaut) ou "fra"."""
+    return grade_format or "id"
+
+
+def json_response(rows, response: Response, grade_format: str = "id") -> Response:
+    """
+    Réponse JSON encodée directement par orjson, pour les lignes renvoyées par
+    services.streaming.fetch_rows / fetch_row. Ces lignes ont les colonnes du response_model
+    (ou la projection ?fields=), qui reste déclaré pour OpenAPI mais n'est pas réappliqué.
+    Les en-têtes posés par les dépendances sur `response` (ETag, X-Next-Cursor) sont repris.
+    Avec grade_format="fra", les cotations françaises sont ajoutées (services.grades).
+    L'encodage, fait ici dans l'endpoint, est compté dans response_serialization_seconds.
+    """
+    if grade_format == "fra":
+        add_french_grades(rows if isinstance(rows, list) else [rows])
+    start = time.perf_counter()
+    body = orjson.dumps(rows)
+    record_serialization(time.perf_counter() - start)
+    return Response(body, media_type="application/json", headers=response.headers)
+
+
+async def _ndjson_chunks(query: Select, grade_format: str):
+    async for batch in stream_rows(query):
+        rows = [dict(row) for row in batch]
+        if grade_format == "fra":
+            add_french_grades(rows)
+        yield b"".join(orjson.dumps(row) + b"\n" for row in rows)
+
+
+async def _csv_chunks(query: Select, grade_format: str):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    columns = selected_columns(query)
+    if grade_format == "fra":
+        columns += [f"{column}_fra" for column in GRADE_COLUMNS if column in columns]
+    writer.writerow(columns)
+    async for batch in stream_rows(query):
+        rows = [dict(row) for row in batch]
+        if grade_format == "fra":
+            add_french_grades(rows)
+        writer.writerows(row.values() for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def streaming_response(query: Select, fmt: str, grade_format: str = "id") -> StreamingResponse:
+    """Réponse en flux (NDJSON ou CSV) pour une requête select."""
+    chunks = _ndjson_chunks(query, grade_format) if fmt == "ndjson" else _csv_chunks(query, grade_format)
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[fmt])
@@ -1,28 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import HTTPBearer
-from sqlalchemy.orm import Session
-from typing import List
-from starlette.requests import Request
-from routers.utils import verify_autorization_header
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from routers.utils import require_auth, encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
 import schemas
 from models import get_db
 import services.users as user_service
+from instrumentation import InstrumentedRoute
 
-router = APIRouter()
-
-security = HTTPBearer()
-
-@router.get("/users/", dependencies=[Depends(security)], response_model=List[schemas.User], tags=["Users"])
-async def get_all_users(request: Request, skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    """Endpoint pour obtenir tous les utilisateurs avec pagination."""
-    auth_header = request.headers.get("Authorization")
-    if not auth_header:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-    
-    token = verify_autorization_header(auth_header)
-    if not token:
-        raise HTTPException(status_code=403, detail="Invalid authorization token")
+router = APIRouter(route_class=InstrumentedRoute)
 
+@router.get("/users/", response_model=List[schemas.User], tags=["Users"])
+async def get_all_users(response: Response, skip: int = 0, limit: int = 10, after: Optional[str] = None, db: AsyncSession = Depends(get_db), token: dict = Depends(require_auth)):
+    """
+    Endpoint pour obtenir tous les utilisateurs avec pagination.
+    Le curseur de la page suivante est renvoyé dans l'en-tête X-Next-Cursor, à repasser dans `after`.
+    """
     user_id = token.get("user_id")
     if not user_id:
         raise HTTPException(status_code=400, detail="User ID not found in token")
@@ -30,19 +23,22 @@ async def get_all_users(request: Request, skip: int = 0, limit: int = 10, db: Se
     if limit <= 0:
         raise HTTPException(status_code=400, detail="Limit must be greater than 0")
     
-    users = user_service.get_all_users(db, user_id=user_id, skip=skip, limit=limit)
+    after_id = decode_cursor(after, UUID) if after else None
+    users = await user_service.get_all_users(db, user_id=user_id, skip=skip, limit=limit, after=after_id)
     if not users:
         raise HTTPException(status_code=404, detail="No users found")
+    if len(users) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(users[-1].id)
     
     return users
 
 @router.post("/users/", response_model=schemas.User, tags=["Users"])
-async def create_user(user: schemas.User, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     """Endpoint pour ajouter un nouvel utilisateur."""
     if not user:
         raise HTTPException(status_code=400, detail="User data is required")
     
-    new_user = user_service.create_user(db, user)
+    new_user = await user_service.create_user(db, user)
     if not new_user:
         raise HTTPException(status_code=500, detail="Failed to create user")
     
@@ -1,17 +1,48 @@
-import jwt
-from fastapi import HTTPException
+import base64
+import json
+import os
 
-from services.auth import JWT_SECRET_KEY, JWT_SECRET_ALGORITHM
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
+from services.auth import verify_token
 
-def verify_autorization_header(access_token: str):
-    if not access_token or not access_token.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="No auth provided.")
+security = HTTPBearer()
 
-    try:
-        token = access_token.split("Bearer ")[1]
-        auth = jwt.decode(token, JWT_SECRET_KEY, JWT_SECRET_ALGORITHM)
-    except jwt.InvalidTokenError as err:
-        raise HTTPException(status_code=401, detail=f"Invalid token.")
 
-    return auth
+async def require_auth(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """
+    Dépendance des endpoints protégés : vérifie le token Bearer (via le cache de
+    services.auth) et retourne ses claims. Répond 401 si le token est invalide ou expiré.
+    """
+    return verify_token(credentials.credentials)
+
+
+# Identifiants (user_id) des administrateurs, séparés par des virgules
+ADMIN_USER_IDS = {user_id.strip() for user_id in os.environ.get("ADMIN_USER_IDS", "").split(",") if user_id.strip()}
+
+
+async def require_admin(claims: dict = Depends(require_auth)) -> dict:
+    """Dépendance des endpoints d'administration : le token doit appartenir à un user_id de ADMIN_USER_IDS."""
+    if claims["user_id"] not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return claims
+
+
+# En-tête portant le curseur de la page suivante (pagination par curseur)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key) -> str:
+    """Encode la clé du dernier élément d'une page en un curseur opaque."""
+    payload = json.dumps({"after": str(key) if not isinstance(key, int) else key})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key_type=int):
+    """Décode un curseur produit par `encode_cursor` et retourne la clé qu'il contient, convertie en `key_type`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return key_type(json.loads(base64.urlsafe_b64decode(padded))["after"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
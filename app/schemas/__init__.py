@@ -1,4 +1,8 @@
-from .climbers import ClimberBase, Climber, ClimberCreate
+from .climbers import ClimberBase, Climber, ClimberCreate, ClimberSearch
 from .routes import RouteBase, Route, RouteCreate
-from .users import UserBase, User, UserCreate
-from .auth_token import AuthToken
\ No newline at end of file
+from .users import UserBase, User, UserCreate, UserLogin
+from .auth_token import AuthToken
+from .batch import ClimberBatch, RouteBatch, BatchItemResult, BatchResult
+from .recommendations import RecommendationBatch, RecommendedRoutes, RecommendationBatchResult
+from .grades import Grade
+from .route_search import RouteSearchResult
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from .climbers import ClimberCreate
+from .routes import RouteCreate
+
+# Nombre maximum d'éléments (upserts + suppressions, chacun) dans une requête batch
+BATCH_MAX_ITEMS = 10000
+
+# Lot d'écritures sur les grimpeurs : créations / mises à jour (upserts) et suppressions par id.
+# atomic = True : tout ou rien ; atomic = False : chaque élément valide est appliqué (best-effort).
+class ClimberBatch(BaseModel):
+    upserts: List[ClimberCreate] = Field(default_factory=list, max_length=BATCH_MAX_ITEMS)
+    deletes: List[int] = Field(default_factory=list, max_length=BATCH_MAX_ITEMS)
+    atomic: bool = True
+
+# Lot d'écritures sur les routes, même fonctionnement que ClimberBatch
+class RouteBatch(BaseModel):
+    upserts: List[RouteCreate] = Field(default_factory=list, max_length=BATCH_MAX_ITEMS)
+    deletes: List[int] = Field(default_factory=list, max_length=BATCH_MAX_ITEMS)
+    atomic: bool = True
+
+# Résultat d'un élément du lot
+class BatchItemResult(BaseModel):
+    id: int
+    action: str  # "upsert" ou "delete"
+    status: str  # "created", "updated", "deleted", "not_found", "failed" ou "rolled_back"
+    detail: Optional[str] = None
+
+# Réponse d'une requête batch : committed vaut False si le lot atomique a été annulé
+class BatchResult(BaseModel):
+    atomic: bool
+    committed: bool
+    results: List[BatchItemResult]
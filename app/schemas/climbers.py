@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 
 class ClimberBase(BaseModel):
@@ -27,3 +28,24 @@ class Climber(ClimberBase):
     
     class Config:
         orm_mode = True
+
+# Paramètres de la recherche composite (/climbers/search), tous optionnels et combinables
+class ClimberSearch(BaseModel):
+    country: Optional[List[str]] = None  # Un ou plusieurs pays (égalité / IN)
+    sex: Optional[int] = Field(None, ge=0, le=1)
+    min_age: Optional[float] = None
+    max_age: Optional[float] = None
+    min_height: Optional[float] = None
+    max_height: Optional[float] = None
+    min_weight: Optional[float] = None
+    max_weight: Optional[float] = None
+    min_years_cl: Optional[int] = None
+    max_years_cl: Optional[int] = None
+    min_grades_max: Optional[int] = None
+    max_grades_max: Optional[int] = None
+    min_grades_mean: Optional[float] = None
+    max_grades_mean: Optional[float] = None
+    sort: Optional[str] = None  # Colonnes séparées par des virgules, préfixe '-' pour un tri décroissant
+    fields: Optional[str] = None  # Colonnes à renvoyer, séparées par des virgules
+    limit: int = Field(100, gt=0, le=1000)
+    skip: int = Field(0, ge=0)
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+# Ligne de la table de conversion des grades
+class Grade(BaseModel):
+    grade_id: int
+    grade_fra: str
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+from .routes import Route
+
+# Nombre maximum de grimpeurs dans une demande de recommandations groupée
+RECOMMENDATION_BATCH_MAX_ITEMS = 10000
+
+# Demande de recommandations pour plusieurs grimpeurs (mêmes paramètres que l'endpoint unitaire)
+class RecommendationBatch(BaseModel):
+    climber_ids: List[int] = Field(..., min_length=1, max_length=RECOMMENDATION_BATCH_MAX_ITEMS)
+    country: Optional[str] = None  # Pays des routes, toutes les routes si absent
+    window: Optional[float] = Field(None, ge=0)  # Écart de grade toléré (RECOMMENDATION_WINDOW par défaut)
+    limit: int = Field(10, gt=0, le=100)
+
+# Routes recommandées à un grimpeur, level étant son grade maximum
+class RecommendedRoutes(BaseModel):
+    climber_id: int
+    level: float
+    routes: List[Route]
+
+# Réponse groupée : missing liste les identifiants de grimpeurs inconnus
+class RecommendationBatchResult(BaseModel):
+    results: List[RecommendedRoutes]
+    missing: List[int]
@@ -0,0 +1,5 @@
+from .routes import Route
+
+# Route trouvée par GET /routes/search, avec la qualité de la correspondance (0 à 1)
+class RouteSearchResult(Route):
+    similarity: float
@@ -5,13 +5,17 @@ from sqlalchemy.dialects.postgresql import UUID
 # Schéma de base pour les users
 class UserBase(BaseModel):
     username : str
-    password : str
 
-# Schéma pour la création d'une nouveau user
+# Schéma pour la création d'une nouveau user (mot de passe en clair, haché à l'enregistrement)
 class UserCreate(UserBase):
-    pass
+    password : str
 
+# Schéma de réponse : l'empreinte du mot de passe n'est jamais renvoyée
 class User(UserBase):
 
     class Config:
         orm_mode = True
+
+# Identifiants envoyés à /auth/token
+class UserLogin(UserBase):
+    password : str
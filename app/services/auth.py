@@ -1,40 +1,113 @@
+import hashlib
 import os
+import time
+from collections import OrderedDict
+from typing import Dict, Tuple
 
 import jwt
 from fastapi import Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import models
-from schemas.users import User
+from metrics import AUTH_TOKEN_CACHE
+from schemas.users import UserLogin
+from services import passwords
 
 JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "should-be-an-environment-variable")
 JWT_SECRET_ALGORITHM = os.getenv("JWT_SECRET_ALGORITHM", "HS256")
+# Durée de validité d'un token d'accès, en secondes
+JWT_ACCESS_TOKEN_TTL = int(os.getenv("JWT_ACCESS_TOKEN_TTL", 3600))
+# Nombre maximum de tokens vérifiés gardés en mémoire (0 désactive le cache)
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 4096))
 
 
-def _encode_jwt(user: User) -> str:
+def _encode_jwt(user: models.User) -> str:
+    now = int(time.time())
     return jwt.encode(
         {
             "user_id": str(user.id),
+            "iat": now,
+            "exp": now + JWT_ACCESS_TOKEN_TTL,
         },
         JWT_SECRET_KEY,
         algorithm=JWT_SECRET_ALGORITHM,
     )
 
 
-def generate_access_token(
-    db: Session,
-    user_login: User,
+async def generate_access_token(
+    db: AsyncSession,
+    user_login: UserLogin,
 ):
-    user = (
-        db.query(models.User)
-        .filter(
-            models.User.username == user_login.username,
-            models.User.password == user_login.password,
-        )
-        .first()
-    )
+    user = await db.scalar(select(models.User).where(models.User.username == user_login.username))
 
-    if not user:
+    # La vérification (scrypt) s'exécute dans le pool de services.passwords, hors de la boucle d'événements
+    if not await passwords.verify_password_async(user_login.password, user.password if user else None):
         raise HTTPException(status_code=404, detail="Incorrect username or password")
 
+    # Ancien mot de passe en clair (ou paramètres scrypt modifiés) : réécrit avec l'empreinte actuelle
+    if passwords.needs_rehash(user.password):
+        user.password = await passwords.hash_password_async(user_login.password)
+        await db.commit()
+
     return _encode_jwt(user)
+
+
+class TokenCache:
+    """
+    Cache LRU borné des tokens déjà vérifiés, indexé par le SHA-256 du token.
+
+    Une entrée est valable jusqu'au `exp` du token : tant qu'elle est présente, la
+    signature n'a pas besoin d'être vérifiée de nouveau. Chaque processus a son cache.
+    """
+
+    def __init__(self, maxsize: int = AUTH_TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict]]" = OrderedDict()
+
+    def get(self, key: bytes):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, claims = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return claims
+
+    def set(self, key: bytes, claims: Dict):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (claims["exp"], claims)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def verify_token(token: str) -> Dict:
+    """
+    Vérifie un token d'accès et retourne ses claims (user_id, iat, exp).
+    Lève une 401 si le token est invalide, expiré ou sans user_id.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is not None:
+        AUTH_TOKEN_CACHE.labels("hit").inc()
+        return claims
+
+    AUTH_TOKEN_CACHE.labels("miss").inc()
+    try:
+        claims = jwt.decode(
+            token, JWT_SECRET_KEY, algorithms=[JWT_SECRET_ALGORITHM], options={"require": ["exp", "user_id"]}
+        )
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Invalid token.")
+    token_cache.set(key, claims)
+    return claims
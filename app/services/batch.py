@@ -0,0 +1,141 @@
+"""
+Écritures par lots (endpoints /climbers/batch et /routes/batch).
+
+Les upserts sont envoyés en INSERT ... ON CONFLICT DO UPDATE multi-lignes et les
+suppressions en DELETE ... WHERE id IN (...) RETURNING id, par paquets de
+BATCH_CHUNK_SIZE éléments, dans une seule transaction.
+
+Chaque paquet s'exécute dans un SAVEPOINT ; un paquet en erreur est rejoué ligne par
+ligne pour identifier les éléments fautifs.
+- Mode atomique : le premier paquet en erreur annule tout le lot ; seuls ses éléments
+  fautifs sont signalés en échec, les autres sont annulés (rolled_back).
+- Mode best-effort : seuls les éléments fautifs sont écartés.
+"""
+import os
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import Executable, Table, delete, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", 500))
+
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _chunks(items: Sequence, size: int = BATCH_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _error(err: SQLAlchemyError) -> str:
+    return str(getattr(err, "orig", None) or err).splitlines()[0]
+
+
+def upsert_statement(db: AsyncSession, table: Table, rows: List[dict]) -> Executable:
+    """INSERT multi-lignes qui met à jour toutes les colonnes quand la clé primaire existe déjà."""
+    insert = _INSERTS[db.get_bind().dialect.name]
+    pk = table.primary_key.columns[0]
+    statement = insert(table).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[pk],
+        set_={column.name: statement.excluded[column.name] for column in table.columns if column is not pk},
+    )
+
+
+async def _execute(db: AsyncSession, statement: Executable) -> list:
+    result = await db.execute(statement)
+    return result.all() if result.returns_rows else []
+
+
+class _Rollback(Exception):
+    """Interrompt un lot atomique après une erreur SQL, avec les éléments fautifs (clé -> erreur)."""
+
+    def __init__(self, action: str, failed: Dict[object, str]):
+        self.action, self.failed = action, failed
+
+
+async def _run(db: AsyncSession, action: str, keys: list, build: Callable[[list], Executable],
+               atomic: bool, failed: Dict[object, str]) -> list:
+    """
+    Exécute `build(paquet)` pour chaque paquet de clés et retourne les lignes renvoyées
+    (RETURNING). En best-effort, les clés en erreur sont ajoutées à `failed`.
+    """
+    returned = []
+    for chunk in _chunks(keys):
+        try:
+            async with db.begin_nested():
+                returned += await _execute(db, build(chunk))
+            continue
+        except SQLAlchemyError as err:
+            chunk_error = _error(err)
+        chunk_failed = {}
+        for key in chunk:  # Paquet rejoué élément par élément pour isoler les erreurs
+            try:
+                async with db.begin_nested():
+                    returned += await _execute(db, build([key]))
+            except SQLAlchemyError as err:
+                chunk_failed[key] = _error(err)
+        if atomic:
+            # Erreur propre au paquet entier (aucun élément fautif seul) : tout le paquet est en échec
+            raise _Rollback(action, chunk_failed or {key: chunk_error for key in chunk})
+        failed.update(chunk_failed)
+    return returned
+
+
+async def apply_batch(db: AsyncSession, table: Table, upserts: List[dict], deletes: List[int],
+                      atomic: bool = True) -> Tuple[dict, List[dict], List[int]]:
+    """
+    Applique les upserts puis les suppressions d'un lot et valide la transaction.
+
+    Retourne la réponse (voir schemas.BatchResult), les lignes effectivement écrites et
+    les identifiants effectivement supprimés ; ces deux listes sont vides si le lot est annulé.
+    Si un même identifiant apparaît plusieurs fois dans les upserts, la dernière version l'emporte.
+    """
+    pk = table.primary_key.columns[0]
+    rows = {row[pk.name]: row for row in upserts}
+    delete_ids = list(dict.fromkeys(deletes))
+    failed_upserts: Dict[int, str] = {}
+    failed_deletes: Dict[int, str] = {}
+
+    existing = set()
+    for chunk in _chunks(list(rows)):
+        existing.update(await db.scalars(select(pk).where(pk.in_(chunk))))
+
+    try:
+        await _run(db, "upsert", list(rows), lambda ids: upsert_statement(db, table, [rows[i] for i in ids]),
+                   atomic, failed_upserts)
+        deleted = {
+            key for key, in await _run(
+                db, "delete", delete_ids, lambda ids: delete(table).where(pk.in_(ids)).returning(pk),
+                atomic, failed_deletes,
+            )
+        }
+        await db.commit()
+    except _Rollback as rollback:
+        await db.rollback()
+
+        def cancelled(action: str, key: int) -> dict:
+            if action == rollback.action and key in rollback.failed:
+                return {"id": key, "action": action, "status": "failed", "detail": rollback.failed[key]}
+            return {"id": key, "action": action, "status": "rolled_back"}
+
+        results = [cancelled("upsert", row[pk.name]) for row in upserts] + [cancelled("delete", key) for key in deletes]
+        return {"atomic": atomic, "committed": False, "results": results}, [], []
+
+    results = []
+    for row in upserts:
+        key = row[pk.name]
+        if key in failed_upserts:
+            results.append({"id": key, "action": "upsert", "status": "failed", "detail": failed_upserts[key]})
+        else:
+            results.append({"id": key, "action": "upsert", "status": "updated" if key in existing else "created"})
+    for key in deletes:
+        if key in failed_deletes:
+            results.append({"id": key, "action": "delete", "status": "failed", "detail": failed_deletes[key]})
+        else:
+            results.append({"id": key, "action": "delete", "status": "deleted" if key in deleted else "not_found"})
+
+    written = [row for key, row in rows.items() if key not in failed_upserts]
+    return {"atomic": atomic, "committed": True, "results": results}, written, sorted(deleted)
@@ -0,0 +1,34 @@
+"""
+Suivi des écritures par table.
+
+Chaque service d'écriture appelle `notify(table)` après un commit réussi : le
+compteur de version de la table est incrémenté et les abonnés (cache de
+réponses, ...) sont prévenus. Les compteurs sont propres au processus.
+"""
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Tuple
+
+_versions: Dict[str, int] = defaultdict(int)
+_listeners: Dict[str, List[Callable[[str], None]]] = defaultdict(list)
+
+
+def version(table: str) -> int:
+    """Version courante d'une table (nombre d'écritures depuis le démarrage)."""
+    return _versions[table]
+
+
+def versions(tables: Iterable[str]) -> Tuple[int, ...]:
+    return tuple(_versions[table] for table in tables)
+
+
+def subscribe(table: str, callback: Callable[[str], None]):
+    """Enregistre une fonction appelée avec le nom de la table à chaque écriture."""
+    _listeners[table].append(callback)
+
+
+def notify(*tables: str):
+    """Signale qu'une écriture a été validée sur ces tables."""
+    for table in tables:
+        _versions[table] += 1
+        for callback in _listeners[table]:
+            callback(table)
@@ -1,65 +1,179 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import distinct, func, case
+from typing import List, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, select, update, delete, func, case
 from fastapi import HTTPException
 from datetime import datetime
 import models, schemas
+from services import batch, changes, dashboard, snapshot
+from services.streaming import fetch_row, fetch_rows, project
 
 
-def get_all_climbers(db: Session, skip: int = 0, limit: int = 10) -> List[models.Climber]:
-    """Obtenir tous les grimpeurs avec pagination."""
-    records = db.query(models.Climber).offset(skip).limit(limit).all()
-    return records
-
-def get_climber_by_id(db: Session, climber_id: int) -> models.Climber:
-    """Obtenir une route par son identifiant (name_id)."""
-    record = db.query(models.Climber).filter(models.Climber.climber_id == climber_id).first()
-    return record
-
-def create_climber(db: Session, climber: schemas.Climber) -> models.Climber:
+async def get_all_climbers(db: AsyncSession, skip: int = 0, limit: int = 10, after: Optional[int] = None, fields: Sequence[str] = ()) -> List[dict]:
+    """
+    Obtenir tous les grimpeurs triés par identifiant, avec pagination.
+    Si `after` est fourni, la page commence après ce climber_id (pagination par curseur, coût
+    constant quelle que soit la profondeur) et `skip` est ignoré.
+    Avec `fields`, climber_id est toujours renvoyé : il sert au curseur de la page suivante.
+    """
+    if fields and "climber_id" not in fields:
+        fields = ["climber_id", *fields]
+    query = project(select(models.Climber), fields).order_by(models.Climber.climber_id).limit(limit)
+    if after is not None:
+        query = query.where(models.Climber.climber_id > after)
+    else:
+        query = query.offset(skip)
+    return await fetch_rows(db, query)
+
+async def get_climber_by_id(db: AsyncSession, climber_id: int, fields: Sequence[str] = ()) -> Optional[dict]:
+    """Obtenir un grimpeur par son identifiant, limité aux colonnes `fields` si elles sont précisées."""
+    return await fetch_row(db, project(select(models.Climber), fields).where(models.Climber.climber_id == climber_id))
+
+async def create_climber(db: AsyncSession, climber: schemas.Climber) -> models.Climber:
     """Ajouter un nouveau grimpeur dans la base de données."""
     db_climber = models.Climber(**climber.dict())  # Utilise Pydantic pour convertir en dict
     db.add(db_climber)
-    db.commit()
-    db.refresh(db_climber)
+    await db.commit()
+    await db.refresh(db_climber)
+    changes.notify("climbers")
+    snapshot.climbers.upsert(db_climber)
     return db_climber
 
-def update_climber(db: Session, climber_id: int, updated_data: schemas.Climber) -> models.Climber:
-    """Mettre à jour un grimpeur existant en une seule ligne."""
-    db.query(models.Climber).filter(models.Climber.climber_id == climber_id).update(updated_data.dict(exclude_unset=True))
-    db.commit()
-    db_climber = db.query(models.Climber).filter(models.Climber.climber_id == climber_id).first()
+async def update_climber(db: AsyncSession, climber_id: int, updated_data: schemas.Climber) -> Optional[models.Climber]:
+    """Mettre à jour un grimpeur existant en une seule requête (UPDATE ... RETURNING). Retourne None s'il n'existe pas."""
+    db_climber = await db.scalar(
+        update(models.Climber)
+        .where(models.Climber.climber_id == climber_id)
+        .values(updated_data.dict(exclude_unset=True))
+        .returning(models.Climber)
+    )
+    await db.commit()
+    if db_climber:
+        changes.notify("climbers")
+        # Le corps peut changer la clé primaire : l'ancienne ligne est retirée avant l'ajout
+        snapshot.climbers.remove(climber_id)
+        snapshot.climbers.upsert(db_climber)
     return db_climber
 
-def delete_climber(db: Session, user_id: int) -> bool:
-    """Supprimer une route de la base de données."""
-    db_user = db.query(models.Climber).filter(models.Climber.climber_id == user_id).first()
-
-    if db_user:
-        db.delete(db_user)
-        db.commit()
-        return True
-    return False
+async def delete_climber(db: AsyncSession, user_id: int) -> bool:
+    """Supprimer un grimpeur en une seule requête (DELETE ... RETURNING)."""
+    deleted_id = await db.scalar(
+        delete(models.Climber).where(models.Climber.climber_id == user_id).returning(models.Climber.climber_id)
+    )
+    await db.commit()
+    if deleted_id is None:
+        return False
+    changes.notify("climbers")
+    snapshot.climbers.remove(user_id)
+    return True
+
+async def apply_climber_batch(db: AsyncSession, climbers_batch: schemas.ClimberBatch) -> dict:
+    """Applique un lot d'upserts et de suppressions de grimpeurs (voir services.batch)."""
+    result, written, deleted = await batch.apply_batch(
+        db,
+        models.Climber.__table__,
+        [climber.dict() for climber in climbers_batch.upserts],
+        climbers_batch.deletes,
+        climbers_batch.atomic,
+    )
+    if written or deleted:
+        changes.notify("climbers")
+        for row in written:
+            snapshot.climbers.upsert(models.Climber(**row))
+        for climber_id in deleted:
+            snapshot.climbers.remove(climber_id)
+    return result
 
 #############################################################################################
 #############################################################################################
 #############################################################################################
 
-def get_country(db: Session) -> List[str]:
+async def get_country(db: AsyncSession) -> List[str]:
     """Obtenir la liste des pays distincts où se trouvent les grimpeurs."""
     # Utilise distinct pour obtenir les pays uniques
-    countries = db.query(distinct(models.Climber.country)).all()
-    return [country[0] for country in countries]  # Retourne une liste de pays sous forme de chaînes
+    countries = await db.scalars(select(models.Climber.country).distinct())
+    return list(countries)  # Retourne une liste de pays sous forme de chaînes
+
+# Requêtes de filtrage, partagées entre les réponses JSON et les réponses en flux (services.streaming)
+
+def climbers_by_sex_query(sex: int, fields: Sequence[str] = ()) -> Select:
+    return project(select(models.Climber), fields).where(models.Climber.sex == sex)
+
+def climbers_by_years_climbing_query(min_years: int = 0, max_years: Optional[int] = None, fields: Sequence[str] = ()) -> Select:
+    query = project(select(models.Climber), fields).where(models.Climber.years_cl >= min_years)
+    if max_years:
+        query = query.where(models.Climber.years_cl <= max_years)
+    return query
+
+def climbers_by_country_query(country: str = "FRA", fields: Sequence[str] = ()) -> Select:
+    return project(select(models.Climber), fields).where(models.Climber.country == country)
+
+def climbers_by_height_query(min_height: float = 190, max_height: Optional[float] = None, fields: Sequence[str] = ()) -> Select:
+    query = project(select(models.Climber), fields).where(models.Climber.height >= min_height)
+    if max_height is not None:
+        query = query.where(models.Climber.height <= max_height)
+    return query
+
+def climbers_by_weight_query(min_weight: float = 90, max_weight: Optional[float] = None, fields: Sequence[str] = ()) -> Select:
+    query = project(select(models.Climber), fields).where(models.Climber.weight >= min_weight)
+    if max_weight is not None:
+        query = query.where(models.Climber.weight <= max_weight)
+    return query
+
+def climbers_by_age_query(min_age: int = 55, max_age: Optional[int] = None, fields: Sequence[str] = ()) -> Select:
+    query = project(select(models.Climber), fields).where(models.Climber.age >= min_age)
+    if max_age is not None:
+        query = query.where(models.Climber.age <= max_age)
+    return query
 
-def get_climbers_by_sex(db: Session, sex: int):
+# Colonnes acceptant un filtre d'intervalle (min_<colonne> / max_<colonne>) dans la recherche composite
+SEARCH_RANGE_COLUMNS = ("age", "height", "weight", "years_cl", "grades_max", "grades_mean")
+
+def _column_names(value: Optional[str]) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()] if value else []
+
+def search_climbers_query(search: schemas.ClimberSearch) -> Select:
+    """
+    Compile une recherche composite en une seule requête SQL : égalités (pays, sexe),
+    intervalles sur les colonnes de SEARCH_RANGE_COLUMNS, tri et projection.
+    Le tri se termine toujours par climber_id pour rester stable d'une page à l'autre.
+    """
+    columns = models.Climber.__table__.columns
+    query = project(select(models.Climber), _column_names(search.fields))
+
+    if search.country:
+        query = query.where(models.Climber.country.in_(search.country))
+    if search.sex is not None:
+        query = query.where(models.Climber.sex == search.sex)
+    for name in SEARCH_RANGE_COLUMNS:
+        low, high = getattr(search, f"min_{name}"), getattr(search, f"max_{name}")
+        if low is not None:
+            query = query.where(columns[name] >= low)
+        if high is not None:
+            query = query.where(columns[name] <= high)
+
+    order_by = []
+    for name in _column_names(search.sort):
+        column = columns.get(name.lstrip("-"))
+        if column is None:
+            raise HTTPException(status_code=400, detail=f"Unknown sort field: {name.lstrip('-')}")
+        order_by.append(column.desc() if name.startswith("-") else column.asc())
+    order_by.append(models.Climber.climber_id.asc())
+
+    return query.order_by(*order_by).offset(search.skip).limit(search.limit)
+
+async def search_climbers(db: AsyncSession, search: schemas.ClimberSearch) -> List[dict]:
+    """Exécute une recherche composite et renvoie les lignes sous forme de dictionnaires."""
+    return await fetch_rows(db, search_climbers_query(search))
+
+async def get_climbers_by_sex(db: AsyncSession, sex: int, fields: Sequence[str] = ()):
     """Obtenir tous les grimpeurs filtrés par sexe (0 = femmes, 1 = hommes)."""
-    
+
     # Validation du paramètre `sex`
     if sex not in [0, 1]:
         raise HTTPException(status_code=400, detail="Le paramètre 'sex' doit être 0 pour les femmes ou 1 pour les hommes")
 
     # Requête pour filtrer les grimpeurs selon le sexe
-    records = db.query(models.Climber).filter(models.Climber.sex == sex).all()
+    records = await fetch_rows(db, climbers_by_sex_query(sex, fields))
 
     # Si aucun grimpeur trouvé
     if not records:
@@ -67,136 +181,142 @@ def get_climbers_by_sex(db: Session, sex: int):
 
     return records
 
-def get_climbers_by_years_climbing(db: Session, min_years: int = 0, max_years: Optional[int] = None):
+async def get_climbers_by_years_climbing(db: AsyncSession, min_years: int = 0, max_years: Optional[int] = None, fields: Sequence[str] = ()):
     """Filtrer les grimpeurs en fonction du nombre d'années d'escalade."""
-    query = db.query(models.Climber).filter(models.Climber.years_cl >= min_years)
-    if max_years:
-        query = query.filter(models.Climber.years_cl <= max_years)
-    
-    return query.all()
+    return await fetch_rows(db, climbers_by_years_climbing_query(min_years, max_years, fields))
 
-def get_climbers_by_country(db: Session, country: str = "FRA"):
+async def get_climbers_by_country(db: AsyncSession, country: str = "FRA", fields: Sequence[str] = ()):
     """Obtenir les grimpeurs venant d'un pays particulier, par défaut 'FRA'."""
-    climbers = db.query(models.Climber).filter(models.Climber.country == country).all()
+    climbers = await fetch_rows(db, climbers_by_country_query(country, fields))
 
     if not climbers:
         raise HTTPException(status_code=404, detail=f"Aucun grimpeur trouvé pour le pays {country}")
 
     return climbers
 
-def get_climbers_by_height(db: Session, min_height: float = 190, max_height: Optional[float] = None):
+async def get_climbers_by_height(db: AsyncSession, min_height: float = 190, max_height: Optional[float] = None, fields: Sequence[str] = ()):
     """Filtrer les grimpeurs en fonction de la taille."""
-    query = db.query(models.Climber).filter(models.Climber.height >= min_height)
-    if max_height is not None:
-        query = query.filter(models.Climber.height <= max_height)
-    
-    return query.all()
+    return await fetch_rows(db, climbers_by_height_query(min_height, max_height, fields))
 
-def get_climbers_by_weight(db: Session, min_weight: float = 90, max_weight: Optional[float] = None):
+async def get_climbers_by_weight(db: AsyncSession, min_weight: float = 90, max_weight: Optional[float] = None, fields: Sequence[str] = ()):
     """Filtrer les grimpeurs en fonction du poids."""
-    query = db.query(models.Climber).filter(models.Climber.weight >= min_weight)
-    if max_weight is not None:
-        query = query.filter(models.Climber.weight <= max_weight)
-    
-    return query.all()
+    return await fetch_rows(db, climbers_by_weight_query(min_weight, max_weight, fields))
 
-def get_climbers_by_age(db: Session, min_age: int = 55, max_age: Optional[int] = None):
+async def get_climbers_by_age(db: AsyncSession, min_age: int = 55, max_age: Optional[int] = None, fields: Sequence[str] = ()):
     """Filtrer les grimpeurs en fonction de l'âge."""
-    query = db.query(models.Climber).filter(models.Climber.age >= min_age)
-    if max_age is not None:
-        query = query.filter(models.Climber.age <= max_age)
-    
-    return query.all()
+    return await fetch_rows(db, climbers_by_age_query(min_age, max_age, fields))
 
 
 #############################################################################################
 #############################################################################################
 #############################################################################################
 
-def get_climbers_by_genders(db: Session,max_age: int = None):
+# Statistiques du dashboard : calculées sur la copie en colonnes (services.snapshot) une fois
+# chargée au démarrage, sinon en SQL (scripts). Les requêtes SQL sont dans les fonctions
+# _*_sql, appelées directement par benchmarks.query_plans.
+
+async def get_climbers_by_genders(db: AsyncSession,max_age: int = None):
+    if snapshot.climbers.loaded:
+        return snapshot.climbers.genders(max_age)
+    return await _get_climbers_by_genders_sql(db, max_age)
+
+async def _get_climbers_by_genders_sql(db: AsyncSession, max_age: Optional[int]):
     # Créer la requête de base pour compter les hommes et les femmes
-    query = db.query(models.Climber.sex, func.count(models.Climber.climber_id).label('count'))
+    query = select(models.Climber.sex, func.count(models.Climber.climber_id).label('count'))
 
     # Appliquer les filtres sur l'âge si fournis
     if max_age is not None:
-        query = query.filter(models.Climber.age <= max_age)
+        query = query.where(models.Climber.age <= max_age)
 
     # Grouper les résultats par sexe
     query = query.group_by(models.Climber.sex)
 
     # Exécuter la requête et obtenir les résultats
-    results = query.all()
+    results = (await db.execute(query)).all()
 
     # Transformer les résultats en un dictionnaire pour l'API
     data = {sex: count for sex, count in results}
 
     return data
 
-def get_climbers_by_experience(db: Session, max_age: int):
+async def get_climbers_by_experience(db: AsyncSession, max_age: int, bounds: Sequence[int] = dashboard.EXPERIENCE_BOUNDS):
     """
     Retourne la répartition des grimpeurs par tranches d'années d'expérience
     en fonction de l'âge maximum.
-    
-    Tranches d'expérience :
+
+    Tranches d'expérience par défaut (voir `dashboard.experience_buckets`) :
     - 0-2 ans
     - 3-5 ans
     - 6-10 ans
     - 10+ ans
+
+    Une fois la copie en colonnes chargée (démarrage de l'API), les tranches sont comptées
+    sur elle. Sinon (scripts), le classement est fait par la base (CASE ... GROUP BY, voir
+    `_get_climbers_by_experience_sql`) : seule une ligne par tranche est renvoyée.
     """
-    # Initialisation des tranches d'expérience
-    experience_buckets = {
-        "0-2 ans": 0,
-        "3-5 ans": 0,
-        "6-10 ans": 0,
-        "10+ ans": 0,
-    }
-    
-    # Requête pour récupérer les grimpeurs dont l'âge est inférieur ou égal à l'âge max
-    climbers = db.query(models.Climber).filter(models.Climber.age <= max_age).all()
-
-    # Parcourir les grimpeurs et les classer dans les tranches d'années d'expérience
-    for climber in climbers:
-        if climber.years_cl <= 2:
-            experience_buckets["0-2 ans"] += 1
-        elif 3 <= climber.years_cl <= 5:
-            experience_buckets["3-5 ans"] += 1
-        elif 6 <= climber.years_cl <= 10:
-            experience_buckets["6-10 ans"] += 1
-        else:
-            experience_buckets["10+ ans"] += 1
-    
-    return experience_buckets
-
-def get_climbers_by_countries(db: Session, max_age: int, limit: int):
+    if snapshot.climbers.loaded:
+        return snapshot.climbers.experience([label for label, _ in dashboard.experience_buckets(bounds)], bounds, max_age)
+    return await _get_climbers_by_experience_sql(db, max_age, bounds)
+
+async def _get_climbers_by_experience_sql(db: AsyncSession, max_age: Optional[int], bounds: Sequence[int] = dashboard.EXPERIENCE_BOUNDS):
+    buckets = dashboard.experience_buckets(bounds)
+    bucket = case(
+        *[(models.Climber.years_cl <= upper, label) for label, upper in buckets[:-1]],
+        else_=buckets[-1][0],
+    ).label("bucket")
+
+    query = select(bucket, func.count(models.Climber.climber_id).label("count"))
+    if max_age is not None:
+        query = query.where(models.Climber.age <= max_age)
+    query = query.group_by(bucket)
+
+    counts = dict((await db.execute(query)).all())
+
+    # Les tranches vides sont renvoyées avec 0, dans l'ordre des bornes
+    return {label: counts.get(label, 0) for label, _ in buckets}
+
+async def get_climbers_by_countries(db: AsyncSession, max_age: int, limit: int):
     """
     Retourne la répartition des grimpeurs par pays (max 5 pays),
     filtrée par l'âge maximum spécifié.
     """
+    if snapshot.climbers.loaded:
+        return snapshot.climbers.countries(max_age, limit)
+    return await _get_climbers_by_countries_sql(db, max_age, limit)
+
+async def _get_climbers_by_countries_sql(db: AsyncSession, max_age: int, limit: int):
     # Requête pour obtenir le nombre de grimpeurs par pays, filtré par l'âge maximum
     country_counts = (
-        db.query(models.Climber.country, func.count(models.Climber.climber_id).label("count"))
-        .filter(models.Climber.age <= max_age)
-        .group_by(models.Climber.country)
-        .order_by(func.count(models.Climber.climber_id).desc())  # Trier par nombre de grimpeurs
-        .limit(limit)  # Limiter à 5 pays
-        .all()
-    )
+        await db.execute(
+            select(models.Climber.country, func.count(models.Climber.climber_id).label("count"))
+            .where(models.Climber.age <= max_age)
+            .group_by(models.Climber.country)
+            .order_by(func.count(models.Climber.climber_id).desc())  # Trier par nombre de grimpeurs
+            .limit(limit)  # Limiter à 5 pays
+        )
+    ).all()
 
     # Conversion du résultat en dictionnaire { 'Pays': nombre_grimpeurs }
     result = {country: count for country, count in country_counts}
     return result
 
-def get_grades_by_age(db: Session, max_age: int):
+async def get_grades_by_age(db: AsyncSession, max_age: int):
     """
     Retourne la moyenne des grades maximum par âge des grimpeurs, filtrés par un âge maximum.
     """
+    if snapshot.climbers.loaded:
+        return snapshot.climbers.grades_by_age(max_age)
+    return await _get_grades_by_age_sql(db, max_age)
+
+async def _get_grades_by_age_sql(db: AsyncSession, max_age: int):
     # Requête pour calculer la moyenne des grades_max pour chaque âge
     grades_by_age = (
-        db.query(models.Climber.age, func.avg(models.Climber.grades_max).label("average_grade_max"))
-        .filter(models.Climber.age <= max_age)
-        .group_by(models.Climber.age)
-        .all()
-    )
+        await db.execute(
+            select(models.Climber.age, func.avg(models.Climber.grades_max).label("average_grade_max"))
+            .where(models.Climber.age <= max_age)
+            .group_by(models.Climber.age)
+        )
+    ).all()
 
     # Retourne les résultats sous forme de liste de dicts [{'age': age, 'average_grade_max': avg_grade}]
     return [{"age": age, "average_grade_max": average_grade_max} for age, average_grade_max in grades_by_age]
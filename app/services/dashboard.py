@@ -0,0 +1,98 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services import snapshot
+
+# Bornes hautes (incluses) des tranches d'années d'expérience affichées par le dashboard
+EXPERIENCE_BOUNDS = (2, 5, 10)
+
+
+def experience_buckets(bounds: Sequence[int] = EXPERIENCE_BOUNDS) -> List[Tuple[str, Optional[int]]]:
+    """
+    Construit les tranches (libellé, borne haute incluse) à partir des bornes.
+    Par exemple (2, 5, 10) donne 0-2 ans, 3-5 ans, 6-10 ans et 10+ ans.
+    """
+    buckets, lower = [], 0
+    for upper in bounds:
+        buckets.append((f"{lower}-{upper} ans", upper))
+        lower = upper + 1
+    buckets.append((f"{bounds[-1]}+ ans", None))
+    return buckets
+
+
+# Tranches d'expérience par défaut : (libellé, borne haute incluse)
+EXPERIENCE_BUCKETS = experience_buckets()
+
+
+def experience_bucket(years_cl: int) -> str:
+    """Retourne le libellé de la tranche d'expérience d'un grimpeur."""
+    for label, upper in EXPERIENCE_BUCKETS:
+        if upper is None or years_cl <= upper:
+            return label
+
+
+class AgeIndexedSummary:
+    """
+    Agrégats du dashboard indexés par âge, calculés sur la copie en colonnes des grimpeurs
+    (services.snapshot), seule source en mémoire tenue à jour par les écritures.
+
+    Pour chaque âge distinct on garde les comptes cumulés (âges croissants) par sexe,
+    tranche d'expérience et pays, ainsi que la moyenne des grades_max. Ils sont recalculés
+    paresseusement quand la copie a changé (un passage bincount/cumsum sur ses colonnes) :
+    une requête `max_age` ne coûte alors qu'une recherche dichotomique et un parcours des
+    âges distincts. Chaque worker uvicorn possède sa propre copie.
+    """
+
+    def __init__(self, climbers: snapshot.ClimberSnapshot):
+        self.climbers = climbers
+        self._version: Optional[int] = None
+        self._ages = np.empty(0)
+        self._sexes = np.empty(0, dtype=np.int64)
+        self._cumulative: Dict[str, np.ndarray] = {}
+        self._grades_by_age: List[dict] = []
+
+    def _refresh(self):
+        if self._version == self.climbers.version:
+            return
+        self._ages, by_age = np.unique(self.climbers.column("age"), return_inverse=True)
+        self._sexes, sexes = np.unique(self.climbers.column("sex"), return_inverse=True)
+        buckets = np.searchsorted(np.asarray(EXPERIENCE_BOUNDS), self.climbers.column("years_cl"), side="left")
+        self._cumulative = {
+            "sex": self._cumulate(by_age, sexes, len(self._sexes)),
+            "experience": self._cumulate(by_age, buckets, len(EXPERIENCE_BUCKETS)),
+            "countries": self._cumulate(by_age, self.climbers.column("country"), len(self.climbers.dictionaries["country"])),
+        }
+        counts = np.bincount(by_age, minlength=len(self._ages))
+        sums = np.bincount(by_age, weights=self.climbers.column("grades_max"), minlength=len(self._ages))
+        self._grades_by_age = [
+            {"age": age, "average_grade_max": average}
+            for age, average in zip(self._ages.tolist(), (sums / np.maximum(counts, 1)).tolist())
+        ]
+        self._version = self.climbers.version
+
+    def _cumulate(self, by_age: np.ndarray, values: np.ndarray, size: int) -> np.ndarray:
+        """Comptes cumulés par âge croissant : la ligne i couvre les i premiers âges (ligne 0 vide)."""
+        counts = np.bincount(by_age * size + values, minlength=len(self._ages) * size).reshape(len(self._ages), size)
+        cumulative = np.zeros((len(self._ages) + 1, size), dtype=np.int64)
+        np.cumsum(counts, axis=0, out=cumulative[1:])
+        return cumulative
+
+    def summary(self, max_age: Optional[int] = None, countries_limit: int = 6) -> dict:
+        """Retourne les quatre jeux de données du dashboard pour les grimpeurs d'âge <= max_age."""
+        self._refresh()
+        end = len(self._ages) if max_age is None else int(np.searchsorted(self._ages, max_age, side="right"))
+        sexes, experience, countries = (self._cumulative[name][end] for name in ("sex", "experience", "countries"))
+        names = self.climbers.dictionaries["country"]
+        top = np.argsort(-countries, kind="stable")[:countries_limit]
+
+        return {
+            "genders": {sex: int(count) for sex, count in zip(self._sexes.tolist(), sexes) if count},
+            "experience": {label: int(count) for (label, _), count in zip(EXPERIENCE_BUCKETS, experience)},
+            "countries": {names[code]: int(countries[code]) for code in top if countries[code]},
+            "grades_by_age": self._grades_by_age[:end],
+        }
+
+
+# Instance partagée par l'application, calculée sur la copie chargée au démarrage (main.startup_event)
+summary = AgeIndexedSummary(snapshot.climbers)
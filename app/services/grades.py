@@ -0,0 +1,66 @@
+"""
+Conversion des grades numériques (grade_id) en cotations françaises, à partir de
+data/grades_conversion_table.csv chargé une seule fois en mémoire.
+
+La table est un tableau NumPy indexé par grade_id : une conversion est un accès par
+indice, et une colonne entière se convertit en une seule opération. Les moyennes
+(grades_mean, grade_mean) sont arrondies au grade le plus proche.
+"""
+import csv
+import hashlib
+import os
+from typing import List, Optional
+
+import numpy as np
+
+GRADES_CSV = os.environ.get(
+    "GRADES_CSV", os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "grades_conversion_table.csv")
+)
+
+# Colonnes de grades des grimpeurs et des routes, complétées par <colonne>_fra sur demande
+GRADE_COLUMNS = ("grades_first", "grades_last", "grades_max", "grades_mean", "grade_mean")
+
+
+class GradeTable:
+    """Table grade_id -> cotation française, indexée par grade_id."""
+
+    def __init__(self, path: str = GRADES_CSV):
+        with open(path, newline="") as file:
+            rows = [(int(row["grade_id"]), row["grade_fra"]) for row in csv.DictReader(file)]
+        self.labels = np.full(max(grade_id for grade_id, _ in rows) + 1, None, dtype=object)
+        for grade_id, label in rows:
+            self.labels[grade_id] = label
+        self.rows = [{"grade_id": grade_id, "grade_fra": label} for grade_id, label in sorted(rows)]
+        with open(path, "rb") as file:
+            self.etag = f'"{hashlib.sha1(file.read()).hexdigest()}"'
+
+    def label(self, grade: float) -> Optional[str]:
+        """Cotation du grade le plus proche, None hors de la table."""
+        grade_id = int(round(grade))
+        return self.labels[grade_id] if 0 <= grade_id < len(self.labels) else None
+
+    def labels_for(self, grades: np.ndarray) -> np.ndarray:
+        """Cotations d'un tableau de grades (arrondis au plus proche), None hors de la table."""
+        ids = np.rint(grades).astype(np.int64)
+        inside = (ids >= 0) & (ids < len(self.labels))
+        labels = np.full(len(ids), None, dtype=object)
+        labels[inside] = self.labels[ids[inside]]
+        return labels
+
+
+grade_table = GradeTable()
+
+
+def add_french_grades(rows: List[dict]) -> List[dict]:
+    """
+    Ajoute à chaque ligne la cotation française de ses colonnes de grades (<colonne>_fra),
+    une colonne à la fois sur l'ensemble des lignes. Les lignes sont modifiées en place.
+    """
+    if not rows:
+        return rows
+    for column in GRADE_COLUMNS:
+        if column in rows[0]:
+            grades = np.fromiter((row[column] for row in rows), dtype=np.float64, count=len(rows))
+            for row, label in zip(rows, grade_table.labels_for(grades).tolist()):
+                row[f"{column}_fra"] = label
+    return rows
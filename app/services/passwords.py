@@ -0,0 +1,104 @@
+"""
+Hachage des mots de passe avec scrypt (hashlib, fonction coûteuse en mémoire).
+
+Un hachage coûte quelques dizaines de millisecondes de CPU : les versions async
+l'exécutent dans un pool de threads borné (hashlib.scrypt libère le GIL), hors de
+la boucle d'événements. Au-delà de PASSWORD_HASH_MAX_PENDING calculs en cours ou en
+attente, les nouvelles demandes sont refusées (503) plutôt que mises en file.
+
+Format stocké : scrypt$<n>$<r>$<p>$<sel base64>$<empreinte base64>
+"""
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from fastapi import HTTPException
+
+# Paramètres scrypt : n=2^14, r=8 -> 16 Mio de mémoire par calcul
+SCRYPT_N = int(os.environ.get("SCRYPT_N", 2 ** 14))
+SCRYPT_R = int(os.environ.get("SCRYPT_R", 8))
+SCRYPT_P = int(os.environ.get("SCRYPT_P", 1))
+SALT_SIZE = 16
+HASH_SIZE = 32
+PREFIX = "scrypt"
+
+# Nombre de hachages exécutés en parallèle et nombre maximum de demandes en cours ou en attente
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 64))
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_pending = 0
+
+
+def _scrypt(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode(), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=HASH_SIZE,
+    )
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def is_hashed(stored: str) -> bool:
+    """Indique si la valeur stockée est une empreinte (et non un ancien mot de passe en clair)."""
+    return stored.startswith(PREFIX + "$")
+
+
+def hash_password(password: str) -> str:
+    """Calcule l'empreinte d'un mot de passe avec un sel aléatoire (appel bloquant)."""
+    salt = os.urandom(SALT_SIZE)
+    digest = _scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"{PREFIX}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password: str, stored: str) -> bool:
+    """
+    Vérifie un mot de passe contre une empreinte (appel bloquant).
+    Les anciens mots de passe en clair sont comparés en temps constant.
+    """
+    if not is_hashed(stored):
+        return hmac.compare_digest(password.encode(), stored.encode())
+    try:
+        _, n, r, p, salt, digest = stored.split("$")
+        expected = base64.b64decode(digest)
+        computed = _scrypt(password, base64.b64decode(salt), int(n), int(r), int(p))
+    except ValueError:
+        return False
+    return hmac.compare_digest(computed, expected)
+
+
+def needs_rehash(stored: str) -> bool:
+    """Vrai pour un mot de passe en clair ou haché avec d'autres paramètres que les actuels."""
+    return not stored.startswith(f"{PREFIX}${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
+
+
+async def _run(func, *args):
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        raise HTTPException(status_code=503, detail="Too many concurrent logins", headers={"Retry-After": "1"})
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+    finally:
+        _pending -= 1
+
+
+async def hash_password_async(password: str) -> str:
+    """`hash_password` exécuté dans le pool de hachage."""
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(password: str, stored: Optional[str]) -> bool:
+    """
+    `verify_password` exécuté dans le pool de hachage. Sans empreinte (utilisateur inconnu),
+    un hachage est tout de même calculé pour ne pas révéler l'existence du compte par le temps de réponse.
+    """
+    if stored is None:
+        await _run(hash_password, password)
+        return False
+    return await _run(verify_password, password, stored)
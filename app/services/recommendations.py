@@ -0,0 +1,138 @@
+"""
+Recommandation de routes aux grimpeurs, selon leur niveau.
+
+Les routes proposées à un grimpeur sont celles dont le grade moyen (grade_mean) tombe dans
+une fenêtre autour de son grade maximum (grades_max, même échelle de grades), classées
+par note (rating_tot). L'index est construit sur la copie en colonnes des routes
+(services.snapshot) : pour chaque pays et pour l'ensemble des routes, les positions
+triées par grade. Une recommandation coûte deux recherches dichotomiques et un top-k
+borné (argpartition) sur la fenêtre, sans parcours de la table.
+L'index est reconstruit à la première recommandation qui suit une écriture sur les routes.
+"""
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from services import snapshot
+
+# Écart de grade toléré, de part et d'autre du grade maximum du grimpeur
+RECOMMENDATION_WINDOW = float(os.environ.get("RECOMMENDATION_WINDOW", 2))
+
+
+class RouteIndex:
+    """Positions des routes de la copie en colonnes triées par grade, par pays et au total."""
+
+    def __init__(self, routes: snapshot.ColumnarSnapshot):
+        self.routes = routes
+        self._version: Optional[int] = None
+        self._all: Tuple[np.ndarray, np.ndarray] = (np.empty(0), np.empty(0, dtype=np.int64))
+        self._by_country: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def _refresh(self):
+        if self._version == self.routes.version:
+            return
+        grades = self.routes.column("grade_mean")
+        countries = self.routes.column("country")
+
+        order = np.argsort(grades, kind="stable")
+        self._all = (grades[order], order)
+
+        # Tri par (pays, grade) : chaque pays occupe une tranche contiguë, triée par grade
+        order = np.lexsort((grades, countries))
+        names = self.routes.dictionaries["country"]
+        bounds = np.searchsorted(countries[order], np.arange(len(names) + 1))
+        self._by_country = {
+            name: (grades[order[start:end]], order[start:end])
+            for name, start, end in zip(names, bounds[:-1], bounds[1:])
+            if end > start
+        }
+        self._version = self.routes.version
+
+    def _sorted(self, country: Optional[str]) -> Tuple[np.ndarray, np.ndarray]:
+        self._refresh()
+        if country is None:
+            return self._all
+        return self._by_country.get(country, (np.empty(0), np.empty(0, dtype=np.int64)))
+
+    def _top(self, candidates: np.ndarray, limit: int) -> np.ndarray:
+        """Les `limit` meilleures routes parmi les candidates, par note décroissante."""
+        ratings = self.routes.column("rating_tot")[candidates]
+        if len(candidates) > limit:
+            best = np.argpartition(-ratings, limit - 1)[:limit]
+            candidates, ratings = candidates[best], ratings[best]
+        return candidates[np.argsort(-ratings, kind="stable")]
+
+    def recommend(self, level: float, country: Optional[str], window: float, limit: int) -> np.ndarray:
+        """Positions (dans la copie des routes) des routes recommandées pour un niveau."""
+        grades, positions = self._sorted(country)
+        low = np.searchsorted(grades, level - window, side="left")
+        high = np.searchsorted(grades, level + window, side="right")
+        return self._top(positions[low:high], limit)
+
+    def recommend_many(self, levels: Sequence[float], country: Optional[str], window: float, limit: int) -> List[np.ndarray]:
+        """
+        Variante vectorisée de `recommend` : les fenêtres de tous les niveaux sont trouvées en
+        une recherche dichotomique groupée, et le top-k n'est calculé qu'une fois par fenêtre
+        distincte (les grades étant entiers, beaucoup de grimpeurs partagent la même).
+        """
+        grades, positions = self._sorted(country)
+        levels = np.asarray(levels, dtype=np.float64)
+        windows = np.stack([
+            np.searchsorted(grades, levels - window, side="left"),
+            np.searchsorted(grades, levels + window, side="right"),
+        ], axis=1)
+        distinct, inverse = np.unique(windows, axis=0, return_inverse=True)
+        tops = [self._top(positions[low:high], limit) for low, high in distinct]
+        return [tops[index] for index in np.ravel(inverse)]
+
+
+route_index = RouteIndex(snapshot.routes)
+
+
+async def _ensure_loaded(db: AsyncSession):
+    # La copie est chargée au démarrage de l'API ; les scripts la chargent au premier appel
+    if not snapshot.routes.loaded:
+        await snapshot.routes.load(db)
+
+
+async def recommend_routes(
+    db: AsyncSession, climber_id: int, country: Optional[str] = None,
+    window: float = RECOMMENDATION_WINDOW, limit: int = 10,
+) -> Optional[List[dict]]:
+    """Routes recommandées pour un grimpeur (None s'il n'existe pas)."""
+    level = await db.scalar(select(models.Climber.grades_max).where(models.Climber.climber_id == climber_id))
+    if level is None:
+        return None
+    await _ensure_loaded(db)
+    return [snapshot.routes.row(position) for position in route_index.recommend(level, country, window, limit)]
+
+
+async def recommend_routes_batch(
+    db: AsyncSession, climber_ids: Sequence[int], country: Optional[str] = None,
+    window: float = RECOMMENDATION_WINDOW, limit: int = 10,
+) -> dict:
+    """
+    Routes recommandées pour plusieurs grimpeurs, en une requête SQL et une passe vectorisée.
+    Retourne {"results": [{climber_id, level, routes}], "missing": [identifiants inconnus]}.
+    """
+    levels = dict((await db.execute(
+        select(models.Climber.climber_id, models.Climber.grades_max).where(models.Climber.climber_id.in_(climber_ids))
+    )).all())
+    await _ensure_loaded(db)
+    found = [climber_id for climber_id in dict.fromkeys(climber_ids) if climber_id in levels]
+    recommendations = route_index.recommend_many([levels[climber_id] for climber_id in found], country, window, limit)
+
+    rows: Dict[int, dict] = {}  # Une route recommandée à plusieurs grimpeurs n'est décodée qu'une fois
+    results = []
+    for climber_id, positions in zip(found, recommendations):
+        routes = []
+        for position in positions.tolist():
+            if position not in rows:
+                rows[position] = snapshot.routes.row(position)
+            routes.append(rows[position])
+        results.append({"climber_id": climber_id, "level": levels[climber_id], "routes": routes})
+    return {"results": results, "missing": [climber_id for climber_id in dict.fromkeys(climber_ids) if climber_id not in levels]}
@@ -0,0 +1,225 @@
+"""
+Recherche approchée des routes par nom, site (crag) et secteur, pour l'autocomplétion
+de GET /routes/search.
+
+Le texte est découpé en trigrammes à la manière de pg_trgm : minuscules (sans accents en
+mémoire ; pg_trgm les garde), mots séparés par les caractères non alphanumériques,
+chaque mot complété par deux espaces devant et un derrière. La qualité d'une correspondance est la part des trigrammes de la requête
+présents dans le texte, proche de word_similarity de pg_trgm : un mot complet obtient 1,
+un début de mot en cours de frappe (« ceu » : 3 trigrammes sur 4 dans « Ceuse ») ou un
+mot avec une faute de frappe ne perdent que quelques trigrammes et restent au-dessus du
+seuil ROUTE_SEARCH_MIN_SIMILARITY. Les routes sont classées par qualité et par note :
+score = qualité + ROUTE_SEARCH_RATING_WEIGHT * rating_tot.
+
+Deux moteurs, choisis par ROUTE_SEARCH_BACKEND (auto : sql sous PostgreSQL, memory sinon) :
+- sql : word_similarity de pg_trgm, servi par les index GIN de la migration 0004 ;
+- memory : index inversé trigramme -> valeurs, construit sur les dictionnaires des colonnes
+  texte de la copie en colonnes des routes (services.snapshot). Les valeurs distinctes
+  sont indexées une seule fois et l'index est complété par les nouvelles valeurs au fil
+  des écritures ; la qualité de chaque route est lue dans la qualité de ses valeurs.
+"""
+import math
+import os
+import unicodedata
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import func, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from database import async_engine
+from services import snapshot
+from services.streaming import fetch_rows
+
+ROUTE_SEARCH_BACKEND = os.environ.get("ROUTE_SEARCH_BACKEND", "auto")
+# Part minimale des trigrammes de la requête retrouvés dans le nom, le site ou le secteur
+ROUTE_SEARCH_MIN_SIMILARITY = float(os.environ.get("ROUTE_SEARCH_MIN_SIMILARITY", 0.5))
+# Poids de la note (rating_tot, de -2 à 5) face à la qualité de la correspondance (0 à 1)
+ROUTE_SEARCH_RATING_WEIGHT = float(os.environ.get("ROUTE_SEARCH_RATING_WEIGHT", 0.05))
+
+SEARCH_COLUMNS = ("name", "crag", "sector")
+
+# Nouvelles postings gardées en listes Python avant d'être fusionnées dans les tableaux
+_PENDING_MERGE = 10_000
+
+
+def _words(text: str) -> List[str]:
+    # Accents retirés (« Céüse » -> « ceuse ») : la saisie au clavier les omet souvent
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char if char.isalnum() else " " for char in text if not unicodedata.combining(char)).split()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Trigrammes d'un texte, comme show_trgm de pg_trgm (sans le hachage des caractères multi-octets)."""
+    grams = set()
+    for word in _words(text):
+        padded = f"  {word} "
+        grams.update(padded[index:index + 3] for index in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Index inversé des trigrammes d'une liste de valeurs texte qui ne fait que grandir (un
+    dictionnaire de colonne de la copie en colonnes) : pour chaque trigramme, les numéros
+    des valeurs qui le contiennent, en un tableau trié (postings) découpé par offsets.
+    """
+
+    def __init__(self, values: List[str]):
+        self.values = values
+        self._indexed = 0
+        self._gram_ids: Dict[str, int] = {}
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._postings = np.empty(0, dtype=np.int32)
+        self._pending: Dict[int, List[int]] = {}
+        self._pending_count = 0
+
+    def _refresh(self):
+        """Indexe les valeurs ajoutées au dictionnaire depuis le dernier appel."""
+        if self._indexed == len(self.values):
+            return
+        for value_id in range(self._indexed, len(self.values)):
+            for gram in trigrams(self.values[value_id]):
+                gram_id = self._gram_ids.setdefault(gram, len(self._gram_ids))
+                self._pending.setdefault(gram_id, []).append(value_id)
+                self._pending_count += 1
+        self._indexed = len(self.values)
+        if self._pending_count >= _PENDING_MERGE:
+            self._merge()
+
+    def _merge(self):
+        lengths = np.diff(self._offsets)
+        grams = np.concatenate([
+            np.repeat(np.arange(len(lengths), dtype=np.int32), lengths),
+            np.fromiter((gram_id for gram_id, ids in self._pending.items() for _ in ids), dtype=np.int32, count=self._pending_count),
+        ])
+        postings = np.concatenate([
+            self._postings,
+            np.fromiter((value_id for ids in self._pending.values() for value_id in ids), dtype=np.int32, count=self._pending_count),
+        ])
+        order = np.argsort(grams, kind="stable")  # Stable : les valeurs restent triées dans chaque trigramme
+        self._postings = postings[order]
+        self._offsets = np.zeros(len(self._gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(grams, minlength=len(self._gram_ids)), out=self._offsets[1:])
+        self._pending = {}
+        self._pending_count = 0
+
+    def _values_with(self, gram: str) -> np.ndarray:
+        gram_id = self._gram_ids.get(gram)
+        if gram_id is None:
+            return np.empty(0, dtype=np.int32)
+        # Un trigramme apparu depuis la dernière fusion n'a que des postings en attente
+        merged = self._postings[self._offsets[gram_id]:self._offsets[gram_id + 1]] if gram_id + 1 < len(self._offsets) else self._postings[:0]
+        pending = self._pending.get(gram_id)
+        return merged if not pending else np.concatenate([merged, np.asarray(pending, dtype=np.int32)])
+
+    def matches(self, grams: Set[str], min_overlap: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Numéros des valeurs qui ont au moins `min_overlap` (>= 1) trigrammes parmi `grams`, et leur nombre."""
+        self._refresh()
+        if not grams:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        overlap = np.bincount(np.concatenate([self._values_with(gram) for gram in grams]), minlength=len(self.values))
+        value_ids = np.flatnonzero(overlap >= max(min_overlap, 1))
+        return value_ids, overlap[value_ids]
+
+
+class RouteSearchIndex:
+    """Recherche sur la copie en colonnes des routes, un TrigramIndex par colonne cherchée."""
+
+    def __init__(self, routes: snapshot.ColumnarSnapshot):
+        self.routes = routes
+        self._indexes: Dict[str, TrigramIndex] = {}
+
+    def _index(self, column: str) -> TrigramIndex:
+        # Un rechargement de la copie remplace ses dictionnaires : l'index est alors reconstruit
+        index = self._indexes.get(column)
+        if index is None or index.values is not self.routes.dictionaries[column]:
+            index = self._indexes[column] = TrigramIndex(self.routes.dictionaries[column])
+        return index
+
+    def warm_up(self):
+        """Indexe toutes les valeurs actuelles (sinon fait à la première recherche)."""
+        for column in SEARCH_COLUMNS:
+            self._index(column)._refresh()
+
+    def search(self, query: str, country: Optional[str], limit: int, min_similarity: float = ROUTE_SEARCH_MIN_SIMILARITY):
+        """Positions des meilleures routes (dans la copie) et leur qualité de correspondance."""
+        nothing = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        grams = trigrams(query)
+        if not grams or len(grams) > 255:  # Comptes sur un octet ; q est limité à 100 caractères par l'endpoint
+            return nothing
+        # Le seuil et le maximum sur les colonnes se calculent en nombre de trigrammes communs
+        # (même dénominateur pour toutes les colonnes), sur un octet par route
+        min_overlap = max(math.ceil(min_similarity * len(grams) - 1e-9), 1)
+        overlap = None
+        for column in SEARCH_COLUMNS:
+            value_ids, counts = self._index(column).matches(grams, min_overlap)
+            if not len(value_ids):
+                continue
+            by_value = np.zeros(len(self.routes.dictionaries[column]), dtype=np.uint8)
+            by_value[value_ids] = counts
+            # Un accès par code dans une table d'un octet par valeur, qui tient en cache
+            by_route = np.take(by_value, self.routes.column(column))
+            overlap = by_route if overlap is None else np.maximum(overlap, by_route, out=overlap)
+        if overlap is None:
+            return nothing
+        mask = overlap > 0
+        if country is not None:
+            code = self.routes.code("country", country)
+            if code is None:
+                return nothing
+            mask &= self.routes.column("country") == code
+
+        candidates = np.flatnonzero(mask)
+        quality = (overlap[candidates] / len(grams)).astype(np.float32)
+        scores = quality + ROUTE_SEARCH_RATING_WEIGHT * self.routes.column("rating_tot")[candidates]
+        if len(candidates) > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+            candidates, quality, scores = candidates[best], quality[best], scores[best]
+        order = np.argsort(-scores, kind="stable")
+        return candidates[order], quality[order]
+
+
+route_search_index = RouteSearchIndex(snapshot.routes)
+
+
+def backend() -> str:
+    """Moteur de recherche utilisé : sql (pg_trgm) ou memory (index en mémoire)."""
+    if ROUTE_SEARCH_BACKEND != "auto":
+        return ROUTE_SEARCH_BACKEND
+    return "sql" if async_engine.dialect.name == "postgresql" else "memory"
+
+
+async def _search_sql(db: AsyncSession, query: str, country: Optional[str], limit: int) -> List[dict]:
+    """Recherche par pg_trgm : l'opérateur <% (word_similarity au-dessus du seuil) est servi par les index GIN."""
+    # Seuil de <% pour la transaction en cours (pg_trgm.word_similarity_threshold vaut 0.6 par défaut)
+    await db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(ROUTE_SEARCH_MIN_SIMILARITY), True)))
+    columns = [getattr(models.Route, column) for column in SEARCH_COLUMNS]
+    similarity = func.greatest(*[func.word_similarity(query, column) for column in columns]).label("similarity")
+    statement = (
+        select(models.Route, similarity)
+        .where(or_(*[literal(query).op("<%")(column) for column in columns]))
+        .order_by((similarity + ROUTE_SEARCH_RATING_WEIGHT * models.Route.rating_tot).desc())
+        .limit(limit)
+    )
+    if country is not None:
+        statement = statement.where(models.Route.country == country)
+    return await fetch_rows(db, statement)
+
+
+async def search_routes(db: AsyncSession, query: str, country: Optional[str] = None, limit: int = 10) -> List[dict]:
+    """
+    Routes dont le nom, le site ou le secteur correspond à `query` (début de mot ou faute de
+    frappe tolérée), classées par qualité de correspondance et par note. Chaque ligne porte
+    sa qualité dans `similarity`.
+    """
+    if backend() == "sql":
+        return await _search_sql(db, query, country, limit)
+    if not snapshot.routes.loaded:
+        await snapshot.routes.load(db)  # Chargée au démarrage de l'API ; les scripts la chargent au premier appel
+    positions, similarities = route_search_index.search(query, country, limit)
+    return [
+        {**snapshot.routes.row(position), "similarity": similarity}
+        for position, similarity in zip(positions.tolist(), similarities.tolist())
+    ]
@@ -1,63 +1,101 @@
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, select, update, delete
+from typing import List, Optional, Sequence
 import models, schemas
+from services import batch, changes, snapshot
+from services.streaming import fetch_row, fetch_rows, project
 
-def get_all_routes(db: Session, skip: int = 0, limit: int = 10) -> List[models.Route]:
-    """Obtenir toutes les routes avec pagination."""
-    records = db.query(models.Route).offset(skip).limit(limit).all()
-    return records
+async def get_all_routes(db: AsyncSession, skip: int = 0, limit: int = 10, after: Optional[int] = None, fields: Sequence[str] = ()) -> List[dict]:
+    """
+    Obtenir toutes les routes triées par identifiant, avec pagination.
+    Si `after` est fourni, la page commence après ce name_id et `skip` est ignoré.
+    Avec `fields`, name_id est toujours renvoyé : il sert au curseur de la page suivante.
+    """
+    if fields and "name_id" not in fields:
+        fields = ["name_id", *fields]
+    query = project(select(models.Route), fields).order_by(models.Route.name_id).limit(limit)
+    if after is not None:
+        query = query.where(models.Route.name_id > after)
+    else:
+        query = query.offset(skip)
+    return await fetch_rows(db, query)
 
-def get_route_by_id(db: Session, name_id: int) -> models.Route:
-    """Obtenir une route par son identifiant (name_id)."""
-    record = db.query(models.Route).filter(models.Route.name_id == name_id).first()
-    return record
+async def get_route_by_id(db: AsyncSession, name_id: int, fields: Sequence[str] = ()) -> Optional[dict]:
+    """Obtenir une route par son identifiant (name_id), limitée aux colonnes `fields` si elles sont précisées."""
+    return await fetch_row(db, project(select(models.Route), fields).where(models.Route.name_id == name_id))
 
-def create_route(db: Session, route: schemas.RouteCreate) -> models.Route:
+async def create_route(db: AsyncSession, route: schemas.RouteCreate) -> models.Route:
     """Ajouter une nouvelle route dans la base de données."""
     db_route = models.Route(**route.dict())
     db.add(db_route)
-    db.commit()
-    db.refresh(db_route)
+    await db.commit()
+    changes.notify("routes")
+    await db.refresh(db_route)
+    snapshot.routes.upsert(db_route)
     return db_route
 
-def update_route(db: Session, name_id: int, updated_data: schemas.RouteCreate) -> models.Route:
-    """Mettre à jour une route existante."""
-    db_route = db.query(models.Route).filter(models.Route.name_id == name_id).first()
-
+async def update_route(db: AsyncSession, name_id: int, updated_data: schemas.RouteCreate) -> Optional[models.Route]:
+    """Mettre à jour une route existante en une seule requête (UPDATE ... RETURNING). Retourne None si elle n'existe pas."""
+    db_route = await db.scalar(
+        update(models.Route)
+        .where(models.Route.name_id == name_id)
+        .values(updated_data.dict(exclude_unset=True))
+        .returning(models.Route)
+    )
+    await db.commit()
     if db_route:
-        updated_data_dict = updated_data.dict(exclude_unset=True)
-        for key, value in updated_data_dict.items():
-            setattr(db_route, key, value)
-        
-        db.commit()
-        db.refresh(db_route)
-        return db_route
-    return None
-
-def delete_route(db: Session, name_id: int) -> bool:
-    """Supprimer une route de la base de données."""
-    db_route = db.query(models.Route).filter(models.Route.name_id == name_id).first()
+        changes.notify("routes")
+        # Le corps peut changer la clé primaire : l'ancienne ligne est retirée avant l'ajout
+        snapshot.routes.remove(name_id)
+        snapshot.routes.upsert(db_route)
+    return db_route
 
-    if db_route:
-        db.delete(db_route)
-        db.commit()
-        return True
-    return False
+async def delete_route(db: AsyncSession, name_id: int) -> bool:
+    """Supprimer une route en une seule requête (DELETE ... RETURNING)."""
+    deleted_id = await db.scalar(
+        delete(models.Route).where(models.Route.name_id == name_id).returning(models.Route.name_id)
+    )
+    await db.commit()
+    if deleted_id is None:
+        return False
+    changes.notify("routes")
+    snapshot.routes.remove(name_id)
+    return True
+
+async def apply_route_batch(db: AsyncSession, routes_batch: schemas.RouteBatch) -> dict:
+    """Applique un lot d'upserts et de suppressions de routes (voir services.batch)."""
+    result, written, deleted = await batch.apply_batch(
+        db,
+        models.Route.__table__,
+        [route.dict() for route in routes_batch.upserts],
+        routes_batch.deletes,
+        routes_batch.atomic,
+    )
+    if written or deleted:
+        changes.notify("routes")
+        for row in written:
+            snapshot.routes.upsert(models.Route(**row))
+        for name_id in deleted:
+            snapshot.routes.remove(name_id)
+    return result
+
+def routes_by_country_query(country: str, fields: Sequence[str] = ()) -> Select:
+    return project(select(models.Route), fields).where(models.Route.country == country)
 
-def get_routes_by_country(db: Session, country: str) -> List[models.Route]:
+async def get_routes_by_country(db: AsyncSession, country: str, fields: Sequence[str] = ()) -> List[dict]:
     """Obtenir des routes par pays."""
-    records = db.query(models.Route).filter(models.Route.country == country).all()
-    return records
+    return await fetch_rows(db, routes_by_country_query(country, fields))
 
-def get_top_routes_by_grade(db: Session, limit: int = 10) -> List[models.Route]:
+async def get_top_routes_by_grade(db: AsyncSession, limit: int = 10, fields: Sequence[str] = ()) -> List[dict]:
     """Obtenir les routes avec la meilleure note moyenne."""
-    records = db.query(models.Route).order_by(models.Route.grade_mean.desc()).limit(limit).all()
-    return records
+    return await fetch_rows(db, project(select(models.Route), fields).order_by(models.Route.grade_mean.desc()).limit(limit))
 
-def get_best_route_by_country(db: Session, country: str, limit: int = 1) -> List[models.Route]:
+async def get_best_route_by_country(db: AsyncSession, country: str, limit: int = 1, fields: Sequence[str] = ()) -> List[dict]:
     """Obtenir la ou les meilleures routes pour un pays donné, triées par la meilleure note moyenne."""
-    records = db.query(models.Route)\
-                .filter(models.Route.country == country)\
-                .order_by(models.Route.grade_mean.desc())\
-                .limit(limit).all()
-    return records
+    return await fetch_rows(
+        db,
+        project(select(models.Route), fields)
+        .where(models.Route.country == country)
+        .order_by(models.Route.grade_mean.desc())
+        .limit(limit)
+    )
@@ -0,0 +1,200 @@
+"""
+Copies en colonnes des tables climbers et routes, en mémoire.
+
+Chaque colonne du modèle est un tableau NumPy typé (entiers, flottants, datetime64) ;
+les colonnes texte (pays, ...) sont encodées par dictionnaire (un code entier par ligne
+et la liste des valeurs). Les statistiques du dashboard sont calculées sur la copie des
+grimpeurs par masques et bincount, sans requête SQL ; la copie des routes alimente
+l'index de recommandation (services.recommendations).
+
+Les copies sont chargées au démarrage (main.startup_event) puis corrigées ligne à ligne
+par les écritures de services.climbers et services.routes. Chaque worker uvicorn
+possède ses propres copies.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import DateTime, Float, Integer, String, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+from metrics import SNAPSHOT_BYTES, SNAPSHOT_ROWS
+
+_DTYPES = {Integer: np.int64, Float: np.float64, DateTime: "datetime64[us]", String: np.int32}
+
+
+def _dtype(column):
+    for sql_type, dtype in _DTYPES.items():
+        if isinstance(column.type, sql_type):
+            return dtype
+    raise TypeError(f"Type de colonne non géré : {column.name} ({column.type})")
+
+
+class ColumnarSnapshot:
+    """
+    Tableaux NumPy d'une table, un par colonne, avec une capacité qui double au besoin :
+    seules les `size` premières lignes sont valides. Une suppression déplace la dernière
+    ligne à la place de la ligne retirée, l'ordre des lignes n'est donc pas significatif.
+    Les colonnes String sont encodées par dictionnaire (codes int32 et `dictionaries`).
+    `version` augmente à chaque modification, pour les index construits sur la copie.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.table_columns = model.__table__.columns
+        self.primary_key = model.__table__.primary_key.columns.values()[0].name
+        self.loaded = False
+        self.version = 0
+        self._reset(0)
+
+    def _reset(self, capacity: int):
+        self.size = 0
+        self._columns: Dict[str, np.ndarray] = {
+            column.name: np.empty(capacity, dtype=_dtype(column)) for column in self.table_columns
+        }
+        self.dictionaries: Dict[str, List[str]] = {
+            column.name: [] for column in self.table_columns if isinstance(column.type, String)
+        }
+        self._codes: Dict[str, Dict[str, int]] = {name: {} for name in self.dictionaries}
+        self._positions: Dict[int, int] = {}  # clé primaire -> ligne
+        self._dictionary_bytes = 0  # Taille cumulée des valeurs des dictionnaires, tenue à jour par _encode
+
+    async def load(self, db: AsyncSession):
+        """(Re)construit la copie à partir de la table (une seule lecture)."""
+        self.load_rows((await db.execute(select(*self.table_columns))).all())
+
+    def load_rows(self, rows: Sequence[tuple]):
+        """(Re)construit la copie à partir de lignes déjà lues (valeurs dans l'ordre des colonnes de la table)."""
+        self._reset(len(rows))
+        for index, column in enumerate(self.table_columns):
+            values = [row[index] for row in rows]
+            if column.name in self.dictionaries:
+                values = [self._encode(column.name, value) for value in values]
+            self._columns[column.name][:] = values
+        self.size = len(rows)
+        self._positions = {key: position for position, key in enumerate(self._columns[self.primary_key][:self.size].tolist())}
+        self.loaded = True
+        self._changed()
+
+    def column(self, name: str) -> np.ndarray:
+        """Vue sur les lignes valides d'une colonne (codes entiers pour une colonne String)."""
+        return self._columns[name][:self.size]
+
+    def code(self, name: str, value: str) -> Optional[int]:
+        """Code d'une valeur d'une colonne String, ou None si elle n'apparaît pas."""
+        return self._codes[name].get(value)
+
+    def position(self, key: int) -> Optional[int]:
+        """Ligne d'une clé primaire, ou None si elle est inconnue."""
+        return self._positions.get(key)
+
+    def row(self, position: int) -> dict:
+        """Ligne décodée en dictionnaire (valeurs Python, dans l'ordre des colonnes de la table)."""
+        row = {}
+        for name, values in self._columns.items():
+            value = values[position].item()
+            row[name] = self.dictionaries[name][value] if name in self.dictionaries else value
+        return row
+
+    def upsert(self, record):
+        """Prend en compte une ligne créée ou modifiée (objet ORM ou tout objet ayant les attributs des colonnes)."""
+        if not self.loaded:
+            return
+        key = getattr(record, self.primary_key)
+        position = self._positions.get(key)
+        if position is None:
+            position = self.size
+            if position == len(self._columns[self.primary_key]):
+                self._grow()
+            self._positions[key] = position
+            self.size += 1
+        for name, values in self._columns.items():
+            value = getattr(record, name)
+            values[position] = self._encode(name, value) if name in self.dictionaries else value
+        self._changed()
+
+    def remove(self, key: int):
+        """Retire une ligne supprimée (sans effet si elle est inconnue)."""
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        last = self.size - 1
+        if position != last:
+            for values in self._columns.values():
+                values[position] = values[last]
+            self._positions[self._columns[self.primary_key][position].item()] = position
+        self.size = last
+        self._changed()
+
+    def nbytes(self) -> int:
+        """Mémoire occupée par les tableaux (capacité comprise) et les dictionnaires."""
+        return sum(values.nbytes for values in self._columns.values()) + self._dictionary_bytes
+
+    def _encode(self, name: str, value: str) -> int:
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self.dictionaries[name])
+            self.dictionaries[name].append(value)
+            self._dictionary_bytes += len(value)
+        return code
+
+    def _grow(self):
+        capacity = max(2 * len(self._columns[self.primary_key]), 1024)
+        for name, values in self._columns.items():
+            grown = np.empty(capacity, dtype=values.dtype)
+            grown[:self.size] = values[:self.size]
+            self._columns[name] = grown
+
+    def _changed(self):
+        self.version += 1
+        SNAPSHOT_ROWS.labels(self.model.__tablename__).set(self.size)
+        SNAPSHOT_BYTES.labels(self.model.__tablename__).set(self.nbytes())
+
+
+class ClimberSnapshot(ColumnarSnapshot):
+    """Statistiques du dashboard calculées sur la copie en colonnes des grimpeurs."""
+
+    def __init__(self):
+        super().__init__(models.Climber)
+
+    def _age_mask(self, max_age: Optional[int]) -> Optional[np.ndarray]:
+        return None if max_age is None else self.column("age") <= max_age
+
+    def _select(self, name: str, mask: Optional[np.ndarray]) -> np.ndarray:
+        values = self.column(name)
+        return values if mask is None else values[mask]
+
+    def genders(self, max_age: Optional[int] = None) -> Dict[int, int]:
+        """Nombre de grimpeurs par sexe (np.unique plutôt que bincount : toute valeur entière est admise, même négative)."""
+        values, counts = np.unique(self._select("sex", self._age_mask(max_age)), return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+    def experience(self, labels: Sequence[str], bounds: Sequence[int], max_age: Optional[int] = None) -> Dict[str, int]:
+        """Nombre de grimpeurs par tranche d'expérience (bornes hautes incluses, comme le CASE SQL)."""
+        years = self._select("years_cl", self._age_mask(max_age))
+        counts = np.bincount(np.searchsorted(np.asarray(bounds), years, side="left"), minlength=len(labels))
+        return {label: int(count) for label, count in zip(labels, counts)}
+
+    def countries(self, max_age: Optional[int] = None, limit: int = 6) -> Dict[str, int]:
+        """Les `limit` pays comptant le plus de grimpeurs."""
+        names = self.dictionaries["country"]
+        counts = np.bincount(self._select("country", self._age_mask(max_age)), minlength=len(names))
+        top = np.argsort(-counts, kind="stable")[:limit]
+        return {names[code]: int(counts[code]) for code in top if counts[code]}
+
+    def grades_by_age(self, max_age: Optional[int] = None) -> List[dict]:
+        """Moyenne des grades_max par âge, par âge croissant."""
+        mask = self._age_mask(max_age)
+        ages, positions = np.unique(self._select("age", mask), return_inverse=True)
+        sums = np.bincount(positions, weights=self._select("grades_max", mask), minlength=len(ages))
+        counts = np.bincount(positions, minlength=len(ages))
+        return [
+            {"age": age, "average_grade_max": average}
+            for age, average in zip(ages.tolist(), (sums / np.maximum(counts, 1)).tolist())
+        ]
+
+
+# Instances partagées par l'application, chargées au démarrage (main.startup_event)
+climbers = ClimberSnapshot()
+routes = ColumnarSnapshot(models.Route)
@@ -0,0 +1,71 @@
+import os
+from typing import AsyncIterator, List, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import AsyncSessionLocal
+
+# Nombre de lignes lues par aller-retour sur le curseur côté serveur
+STREAM_BATCH_SIZE = int(os.environ.get("STREAM_BATCH_SIZE", 1000))
+
+
+def plain_query(query: Select) -> Select:
+    """Remplace les entités ORM sélectionnées par les colonnes de leur table (lignes simples, sans hydratation)."""
+    columns = []
+    for description in query.column_descriptions:
+        expr = description["expr"]
+        columns.extend(expr.__table__.columns if hasattr(expr, "__table__") else [expr])
+    return query.with_only_columns(*columns)
+
+
+def project(query: Select, fields: Sequence[str]) -> Select:
+    """
+    Restreint un select(Modèle) aux colonnes `fields` (paramètre ?fields= des endpoints de
+    lecture), validées contre la table du modèle. Sans `fields`, la requête est inchangée.
+    """
+    if not fields:
+        return query
+    columns = query.column_descriptions[0]["entity"].__table__.columns
+    unknown = [name for name in fields if name not in columns]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return query.with_only_columns(*[columns[name] for name in dict.fromkeys(fields)])
+
+
+async def fetch_rows(db: AsyncSession, query: Select) -> List[dict]:
+    """
+    Exécute une requête (select(Modèle) ou select de colonnes) et renvoie ses lignes sous forme
+    de dictionnaires, sans construire d'objets ORM. Destiné aux listes en lecture seule,
+    encodées telles quelles par routers.streaming.json_response.
+    """
+    result = await db.execute(plain_query(query))
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result.all()]
+
+
+async def fetch_row(db: AsyncSession, query: Select) -> Optional[dict]:
+    """Première ligne de la requête sous forme de dictionnaire (voir fetch_rows), ou None."""
+    row = (await db.execute(plain_query(query))).mappings().first()
+    return dict(row) if row is not None else None
+
+
+def selected_columns(query: Select) -> List[str]:
+    """Noms des colonnes renvoyées par `stream_rows` pour cette requête."""
+    return list(plain_query(query).selected_columns.keys())
+
+
+async def stream_rows(query: Select, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[list]:
+    """
+    Exécute une requête (select(Modèle) ou select de colonnes) et renvoie ses lignes par lots de dictionnaires,
+    lus via un curseur côté serveur : aucun objet ORM n'est construit et seul un lot est en mémoire.
+
+    La session est propre au flux : elle reste ouverte tant que la réponse est envoyée.
+    """
+    statement = plain_query(query).execution_options(yield_per=batch_size)
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(statement)
+        async for batch in result.mappings().partitions():
+            yield batch
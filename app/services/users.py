@@ -1,52 +1,47 @@
 from typing import Optional, List
-from uuid import uuid4
+from uuid import UUID, uuid4
 
-import jwt
 from fastapi import HTTPException
-from jwt import InvalidTokenError
-from sqlalchemy.orm import Session
-from starlette.status import HTTP_401_UNAUTHORIZED
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import models
 from models import get_db
-from schemas.users import User
-from services.auth import JWT_SECRET_KEY, JWT_SECRET_ALGORITHM
+from schemas.users import UserCreate
+from services import passwords
+from services.auth import verify_token
 
 
-def create_user(db: Session, user: User) -> models.User:
-    record = db.query(models.User).filter(models.User.username == user.username).first()
+async def create_user(db: AsyncSession, user: UserCreate) -> models.User:
+    record = await db.scalar(select(models.User).where(models.User.username == user.username))
     if record:
         raise HTTPException(status_code=409, detail="Username already taken")
 
     db_user = models.User(
-        id=str(uuid4()), username=user.username, password=user.password
+        id=uuid4(), username=user.username, password=await passwords.hash_password_async(user.password)
     )
     db.add(db_user)
-    db.commit()
+    await db.commit()
 
     return db_user
 
-def get_all_users(db: Session,user_id: int, skip: int = 0, limit: int = 10) -> List[models.User]:
-    """Obtenir tous les users avec pagination."""
-    records = db.query(models.User).offset(skip).limit(limit).all()
-    return records
+async def get_all_users(db: AsyncSession,user_id: int, skip: int = 0, limit: int = 10, after: Optional[UUID] = None) -> List[models.User]:
+    """
+    Obtenir tous les users triés par identifiant, avec pagination.
+    Si `after` est fourni, la page commence après cet id et `skip` est ignoré.
+    """
+    query = select(models.User).order_by(models.User.id).limit(limit)
+    if after is not None:
+        query = query.where(models.User.id > after)
+    else:
+        query = query.offset(skip)
+    records = await db.scalars(query)
+    return records.all()
 
-def get_user_by_id(db: Session, user_id: int) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.id == user_id).first()
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[models.User]:
+    return await db.scalar(select(models.User).where(models.User.id == user_id))
 
 
 def get_current_user_id(token: str):
-    try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=[JWT_SECRET_ALGORITHM])
-        user_id: str = payload.get("user_id")
-        if user_id is None:
-            raise HTTPException(
-                status_code=HTTP_401_UNAUTHORIZED,
-                detail="Could not validate credentials",
-            )
-        return user_id
-    except InvalidTokenError:
-        raise HTTPException(
-            status_code=HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-        )
+    """Retourne l'identifiant de l'utilisateur d'un token d'accès (401 si le token est invalide)."""
+    return verify_token(token)["user_id"]
@@ -0,0 +1,61 @@
+"""
+Configuration commune des tests : une base SQLite temporaire, créée par les migrations
+et remplie de données synthétiques (benchmarks.synthetic). TEST_DATABASE_URL permet de
+viser une autre base (PostgreSQL local, déjà remplie ou vide).
+
+Les tests se lancent depuis le dossier app/ (dépendances : pip install -r requirements-dev.txt) :
+
+    python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+
+# database.py lit DATABASE_URL à l'import : elle doit être fixée avant tout import de l'application
+os.environ["DATABASE_URL"] = os.environ.get(
+    "TEST_DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='climbing-tests-'), 'test.db')}"
+)
+
+import pytest  # noqa: E402
+
+# Assez de lignes pour que le planificateur préfère les index à un parcours de la table
+TEST_ROWS = int(os.environ.get("TEST_ROWS", 5000))
+
+
+@pytest.fixture(scope="session")
+def seeded_db():
+    """Schéma à jour (migrations) et tables climbers et routes remplies, statistiques calculées."""
+    from sqlalchemy import func, select, text
+
+    import init_db
+    from benchmarks import synthetic
+    from database import engine, run_migrations
+    from models import Climber, Route
+
+    run_migrations()
+    with engine.connect() as conn:
+        seeded = conn.execute(select(func.count()).select_from(Climber.__table__)).scalar()
+    if not seeded:
+        init_db.load_chunks(Climber, synthetic.climbers(TEST_ROWS), init_db._prepare_climbers)
+        init_db.load_chunks(Route, synthetic.routes(TEST_ROWS))
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    return engine.url
+
+
+@pytest.fixture(scope="module")
+def client(seeded_db):
+    """Client de l'API (démarrage compris : copies en mémoire chargées), authentifié."""
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as test_client:
+        credentials = {"username": "tests", "password": "tests"}
+        test_client.post("/users/", json=credentials)
+        token = test_client.post("/auth/token", json=credentials).json()["access_token"]
+        test_client.headers["Authorization"] = f"Bearer {token}"
+        yield test_client
@@ -0,0 +1,30 @@
+"""Lots d'écritures (services.batch) : attribution des erreurs en mode atomique."""
+import asyncio
+
+import models
+from database import AsyncSessionLocal
+from services import batch
+
+
+def _route(name_id: int, name="Voie") -> dict:
+    return {
+        "name_id": name_id, "country": "FRA", "crag": "Site", "sector": "Secteur", "name": name,
+        "tall_recommend_sum": 0, "grade_mean": 50.0, "cluster": 1, "rating_tot": 1.0,
+    }
+
+
+def test_atomic_batch_reports_only_the_failing_item(seeded_db):
+    async def apply():
+        async with AsyncSessionLocal() as db:
+            upserts = [_route(10_000_001), _route(10_000_002, name=None), _route(10_000_003)]
+            return await batch.apply_batch(db, models.Route.__table__, upserts, [10_000_004], atomic=True)
+
+    result, written, deleted = asyncio.run(apply())
+    statuses = {(item["action"], item["id"]): item["status"] for item in result["results"]}
+    assert not result["committed"] and written == [] and deleted == []
+    assert statuses == {
+        ("upsert", 10_000_001): "rolled_back",
+        ("upsert", 10_000_002): "failed",
+        ("upsert", 10_000_003): "rolled_back",
+        ("delete", 10_000_004): "rolled_back",
+    }
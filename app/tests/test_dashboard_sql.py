@@ -0,0 +1,40 @@
+"""Les requêtes SQL du dashboard, utilisées tant que la copie en mémoire n'est pas chargée, donnent les mêmes comptes qu'elle."""
+import asyncio
+
+import pytest
+
+from database import AsyncSessionLocal
+from services import climbers as climber_service
+from services import dashboard, snapshot
+
+
+async def _call(function, *args):
+    async with AsyncSessionLocal() as db:
+        return await function(db, *args)
+
+
+@pytest.fixture(scope="module")
+def climbers(seeded_db):
+    copy = snapshot.ClimberSnapshot()
+
+    async def load():
+        async with AsyncSessionLocal() as db:
+            await copy.load(db)
+
+    asyncio.run(load())
+    return copy
+
+
+@pytest.mark.parametrize("max_age", [None, 30])
+@pytest.mark.parametrize("bounds", [dashboard.EXPERIENCE_BOUNDS, (1, 20)])
+def test_experience_sql_matches_snapshot(climbers, max_age, bounds):
+    labels = [label for label, _ in dashboard.experience_buckets(bounds)]
+    sql = asyncio.run(_call(climber_service._get_climbers_by_experience_sql, max_age, bounds))
+    assert sql == climbers.experience(labels, bounds, max_age)
+    assert list(sql) == labels
+
+
+def test_experience_falls_back_to_sql(climbers, monkeypatch):
+    monkeypatch.setattr(snapshot, "climbers", snapshot.ClimberSnapshot())
+    served = asyncio.run(_call(climber_service.get_climbers_by_experience, 30))
+    assert served == climbers.experience([label for label, _ in dashboard.EXPERIENCE_BUCKETS], dashboard.EXPERIENCE_BOUNDS, 30)
@@ -0,0 +1,21 @@
+"""Les requêtes des services passent par les index des migrations (plans par défaut du planificateur)."""
+import asyncio
+
+import pytest
+
+from benchmarks import query_plans
+
+
+@pytest.fixture(scope="module")
+def plans(seeded_db):
+    results = {}
+    for name, plan, uses_index in asyncio.run(query_plans.check_plans()):
+        results.setdefault(name, []).append((plan, uses_index))
+    return results
+
+
+@pytest.mark.parametrize("scenario", [name for name, _ in query_plans.SCENARIOS])
+def test_scenario_uses_an_index(plans, scenario):
+    assert scenario in plans, f"{scenario} : aucune requête capturée"
+    for plan, uses_index in plans[scenario]:
+        assert uses_index, f"{scenario} : parcours de table\n{plan}"
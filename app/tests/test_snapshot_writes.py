@@ -0,0 +1,64 @@
+"""Les copies en mémoire (services.snapshot) suivent les écritures, y compris un changement de clé primaire."""
+from sqlalchemy import func, select
+
+import models
+from database import engine
+from services import snapshot
+
+
+def _count(model) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(model.__table__)).scalar()
+
+
+def test_climber_primary_key_change_moves_the_row(client):
+    climber = client.get("/climbers/1").json()
+    genders = client.get("/BarChart_Climbers_Genders/", params={"max_age": 100}).json()
+    summary = client.get("/dashboard/summary", params={"max_age": 100}).json()
+
+    response = client.put("/climbers/1", json={**climber, "climber_id": 999_999})
+    assert response.status_code == 200
+    assert snapshot.climbers.size == _count(models.Climber)
+    assert snapshot.climbers.position(1) is None
+    assert client.get("/BarChart_Climbers_Genders/", params={"max_age": 100}).json() == genders
+    assert client.get("/dashboard/summary", params={"max_age": 100}).json() == summary
+
+    assert client.delete("/climbers/999999").status_code == 200
+    assert snapshot.climbers.size == _count(models.Climber)
+    # Les cumuls par âge du dashboard sont recalculés sur la copie après l'écriture
+    assert sum(client.get("/dashboard/summary").json()["genders"].values()) == snapshot.climbers.size
+
+
+def test_route_primary_key_change_moves_the_row(client):
+    route = client.get("/routes/1").json()
+
+    response = client.put("/routes/1", json={**route, "name_id": 999_999})
+    assert response.status_code == 200
+    assert snapshot.routes.size == _count(models.Route)
+    assert snapshot.routes.position(1) is None
+    found = {row["name_id"] for row in client.get("/routes/search", params={"q": route["name"], "limit": 50}).json()}
+    assert 999_999 in found and 1 not in found
+
+    assert client.delete("/routes/999999").status_code == 200
+    assert snapshot.routes.size == _count(models.Route)
+
+
+
+def test_nbytes_tracks_dictionary_values_incrementally(client):
+    route = client.get("/routes/2").json()
+    assert client.put("/routes/2", json={**route, "crag": "Site ajouté par le test"}).status_code == 200
+    for copy in (snapshot.climbers, snapshot.routes):
+        arrays = sum(values.nbytes for values in copy._columns.values())
+        strings = sum(len(value) for dictionary in copy.dictionaries.values() for value in dictionary)
+        assert copy.nbytes() == arrays + strings
+
+
+def test_genders_accept_any_sex_value(client):
+    climber = client.get("/climbers/3").json()
+    assert client.put("/climbers/3", json={**climber, "sex": -1}).status_code == 200
+    try:
+        response = client.get("/BarChart_Climbers_Genders/", params={"max_age": 100})
+        assert response.status_code == 200
+        assert response.json()["-1"] == 1
+    finally:
+        client.put("/climbers/3", json=climber)
@@ -31,65 +31,27 @@ function Dashboard() {
   const [scatterData, setScatterData] = useState([]); // État pour les données du scatter plot
   const [genderData, setGenderData] = useState({ male: 0, female: 0 }); // État pour les données du bar chart
 
-  // Récupération des données du bar chart via l'API BarChart_Climbers_Genders
+  // Récupération des données des quatre graphiques en un seul appel à l'API
   useEffect(() => {
-    const fetchGenderData = async () => {
+    const fetchDashboardData = async () => {
       try {
-        const response = await axios.get(`http://localhost:5000/BarChart_Climbers_Genders?max_age=${ageMax}`);
-        const data = response.data;
-        setGenderData({ male: data["0"], female: data["1"] });
-      } catch (error) {
-        console.error('Erreur lors de la récupération des données du bar chart', error);
-      }
-    };
-
-    fetchGenderData();
-  }, [ageMax]);
-
-  useEffect(() => {
-    const fetchExperienceData = async () => {
-      try {
-        const response = await axios.get(`http://localhost:5000/PieChart_Climbers_Experience?max_age=${ageMax}`);
+        const response = await axios.get(`http://localhost:5000/dashboard/summary?max_age=${ageMax}`);
         const data = response.data;
+        setGenderData({ male: data.genders["0"], female: data.genders["1"] });
         setExperienceData({
-          "0-2 ans": data["0-2 ans"],
-          "3-5 ans": data["3-5 ans"],
-          "6-10 ans": data["6-10 ans"],
-          "10+ ans": data["10+ ans"],
+          "0-2 ans": data.experience["0-2 ans"],
+          "3-5 ans": data.experience["3-5 ans"],
+          "6-10 ans": data.experience["6-10 ans"],
+          "10+ ans": data.experience["10+ ans"],
         });
+        setCountryData(data.countries);
+        setScatterData(data.grades_by_age);
       } catch (error) {
-        console.error('Erreur lors de la récupération des données', error);
-      }
-    };
-
-    fetchExperienceData();
-  }, [ageMax]);
-
-  useEffect(() => {
-    const fetchCountryData = async () => {
-      try {
-        const response = await axios.get(`http://localhost:5000/PieChart_Climbers_Countries?max_age=${ageMax}`);
-        const data = response.data;
-        setCountryData(data);
-      } catch (error) {
-        console.error('Erreur lors de la récupération des données', error);
-      }
-    };
-
-    fetchCountryData();
-  }, [ageMax]);
-
-  useEffect(() => {
-    const fetchScatterData = async () => {
-      try {
-        const response = await axios.get(`http://localhost:5000/scatterGradesByAge?max_age=${ageMax}`);
-        setScatterData(response.data);
-      } catch (error) {
-        console.error('Erreur lors de la récupération des données', error);
+        console.error('Erreur lors de la récupération des données du dashboard', error);
       }
     };
 
-    fetchScatterData();
+    fetchDashboardData();
   }, [ageMax]);
 
   // Options pour la légende